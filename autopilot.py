@@ -0,0 +1,459 @@
+# Description: Autopilot that steers the snake to the fruits with A* and checks it can still reach its tail afterwards
+# Imports
+import time
+from collections import deque
+from heapq import heappop, heappush
+from itertools import islice
+
+from profiler import percentiles
+
+STATS_TICKS = 10000 # Ticks kept for the planning time and node statistics
+NODES_PER_TICK = 400 # Most cells the searches may expand in one tick, a plan that needs more carries on over the next ticks
+SEARCH_NODES_PER_TICK = 200 # Cells a failed plan may search per tick on average, it waits this long before trying again
+PLAN_AHEAD = 8 # Cells along the trail a plan starts from, doubled whenever the head gets there before the plan is found
+MAX_PLAN_AHEAD = 64 # Most cells along the trail a plan starts from, bigger searches take too long to even throw away
+FRUITS_TRIED = 4 # Closest fruits a plan tries before it settles for following the tail
+SLACK = 1 # Ticks early plans would rather the body cleared, so eating a fruit that spawns on the way doesn't trap the snake
+
+# Autopilot class, a policy that is called with the engine every tick and returns the direction to move in
+# Plans are made on packed cell indices straight on the engine's grid. The snake is the cells the head entered on the
+# last `length` ticks, so the tick each cell was entered on tells when it clears, and a path may go through the body
+# where the tail will have moved on by the time the head gets there
+# A plan is a path to a fruit and a way from there back onto the trail of cells the tail leaves behind. Following that
+# trail is always safe, the head only enters cells the tail has left, so once a plan runs out the snake keeps to it.
+# Where the snake will be is known for as long as it keeps to its path, so the next plan is searched from a cell further
+# along it, at most NODES_PER_TICK cells a tick, while the snake gets there
+class Autopilot:
+    def __init__(self, engine):
+        self.path = deque() # Cells still to move through, the next one first
+        self.expected = None # (head, tick) after the next move if it follows the path
+        self.entered = {} # Tick each cell was last entered on, cells the tail left keep theirs so the trail can be followed
+        self.trail = None # Tick the cell at the end of the path was entered on when it is on the trail, otherwise None
+        self.fork = None # Cells of the path up to the fruit of the last plan, the next plan can start from there
+        self.meals = set() # Cells of the path the plans expect to eat a fruit on
+        self.search = None # Plan being searched over several ticks
+        self.root = 0 # Cells of the path before the cell the plan being searched starts from
+        self.search_nodes = 0 # Cells expanded so far when the plan being searched started
+        self.ahead = PLAN_AHEAD # Cells along the trail the next plan starts from
+        self.wait = 0 # Ticks to wait before planning again after a plan found nothing
+        self.budget = 0 # Cells the searches may still expand this tick
+
+        # Statistics
+        self.ticks = 0
+        self.plans = 0 # Times the board was searched
+        self.nodes = 0 # Cells expanded by every search so far
+        self.tick_times = deque(maxlen=STATS_TICKS) # Seconds spent deciding each tick
+        self.tick_nodes = deque(maxlen=STATS_TICKS) # Cells expanded on each tick
+
+    def __call__(self, engine):
+        start = time.perf_counter()
+        nodes = self.nodes
+        direction = self.decide(engine)
+        self.ticks += 1
+        self.tick_times.append(time.perf_counter() - start)
+        self.tick_nodes.append(self.nodes - nodes)
+        return direction
+
+    # Function to pick the direction for this tick, following the path and carrying on with the next plan
+    def decide(self, engine):
+        self.budget = NODES_PER_TICK
+        head = engine.body[0]
+        if (head, engine.ticks) == self.expected:
+            self.entered[head] = engine.ticks
+            if engine.last_tail is None:
+                self.meals.discard(head)
+                self.check_spawned(engine)
+        else:
+            # Something else moved the snake, so nothing that was worked out from where it would be holds
+            self.entered = {cell: engine.ticks - i for i, cell in enumerate(engine.body)}
+            self.forget()
+        if self.path and not self.is_open(engine, self.path[0]):
+            self.forget()
+
+        if self.search is None:
+            if self.wait > 0:
+                self.wait -= 1
+            else:
+                self.start_plan(engine)
+        if self.search is not None:
+            self.continue_plan(engine)
+
+        if not self.path:
+            if self.trail is not None:
+                self.follow_trail(engine, 1)
+            else:
+                self.chase(engine)
+        if not self.path:
+            self.expected = None
+            return None # Trapped, whatever it does it dies
+
+        cell = self.path.popleft()
+        self.root -= 1
+        if self.fork is not None:
+            self.fork -= 1
+            if self.fork == 0:
+                self.fork = None # The fruit is eaten on this move
+        self.expected = (cell, engine.ticks + 1)
+        return self.direction(engine, head, cell)
+
+    # Function to drop the path and the plan being searched
+    def forget(self):
+        self.path.clear()
+        self.meals.clear()
+        self.trail = None
+        self.fork = None
+        self.search = None
+
+    # Function to deal with fruits that spawned on the path after it was planned, eating one makes the tail clear a tick
+    # later than planned. The path is kept if every cell of it still clears in time, otherwise it stops short of the
+    # first new fruit and the way back to the trail from there is searched while the head gets there
+    def check_spawned(self, engine):
+        fruits = {engine.cell(x, y) for x, y in engine.fruits}
+        spawned = [i for i, cell in enumerate(self.path) if cell in fruits and cell not in self.meals]
+        if not spawned:
+            return
+        self.search = None # Planned for a shorter snake
+        now, grid, entered = engine.ticks, engine.grid, self.entered
+        length = len(engine.body)
+        entries = {}
+        for i, cell in enumerate(self.path):
+            entry = entries.get(cell)
+            if entry is None and grid[cell]:
+                entry = entered[cell]
+            if entry is not None and entry + length > now + i + 1:
+                while len(self.path) > spawned[0]:
+                    self.path.pop()
+                self.meals.intersection_update(self.path)
+                self.trail = None
+                self.fork = None
+                self.start_search(engine, self.rejoin(engine, list(self.path)), len(self.path))
+                return
+            entries[cell] = now + i + 1
+            if cell in fruits:
+                length += 1
+        self.meals.update(self.path[i] for i in spawned)
+
+    # Function to check if the head can move into a cell on the next tick
+    def is_open(self, engine, cell):
+        return not engine.grid[cell] or cell == engine.body[-1]
+
+    # Function to get the direction from a cell to a neighbouring cell
+    def direction(self, engine, cell, next_cell):
+        difference = next_cell - cell
+        if difference == 1:
+            return 'RIGHT'
+        if difference == -1:
+            return 'LEFT'
+        return 'DOWN' if difference > 0 else 'UP'
+
+    # Function to get the cells next to a cell that are on the board
+    def neighbours(self, engine, cell):
+        cols = engine.cols
+        x = cell % cols
+        if x > 0:
+            yield cell - 1
+        if x < cols - 1:
+            yield cell + 1
+        if cell - cols >= engine.top_row * cols:
+            yield cell - cols
+        if cell + cols < engine.rows * cols:
+            yield cell + cols
+
+    # Function to add `count` cells of the trail to the end of the path, the cell entered on the tick after the last one
+    # Cells the head enters on the path haven't been entered yet, the path has the one for each tick
+    def follow_trail(self, engine, count):
+        now = engine.ticks
+        cell = self.path[-1] if self.path else engine.body[0]
+        for _ in range(count):
+            tick = self.trail + 1
+            if tick > now:
+                cell = self.path[tick - now - 1]
+            else:
+                for cell in self.neighbours(engine, cell):
+                    if self.entered.get(cell) == tick:
+                        break
+                else:
+                    self.trail = None # Only when the entry ticks are out of step, the chase finds the trail again
+                    return
+            self.path.append(cell)
+            self.trail = tick
+
+    # Function to run a search until it finishes or the cells for this tick run out, returns (finished, result)
+    def run(self, search):
+        try:
+            next(search)
+        except StopIteration as stop:
+            return True, stop.value
+        return False, None
+
+    # Function to start searching for the next plan, from the fruit of the last one once the head is close to it,
+    # otherwise from the cell `ahead` cells along the path, following the trail to get there if it is shorter
+    def start_plan(self, engine):
+        if self.fork is not None:
+            if self.fork > self.ahead:
+                return # Far enough ahead already, what the board will look like by then is too uncertain
+            root = self.fork
+        elif self.trail is not None:
+            if len(self.path) < self.ahead:
+                self.follow_trail(engine, self.ahead - len(self.path))
+            if self.trail is None:
+                return
+            root = min(len(self.path), self.ahead)
+        else:
+            return
+        self.start_search(engine, self.plan(engine, list(islice(self.path, root))), root)
+
+    # Function to start a search that carries on over the next ticks, from `root` cells along the path
+    # The fruits on the way there are eaten as planned
+    def start_search(self, engine, search, root):
+        fruits = {engine.cell(x, y) for x, y in engine.fruits}
+        self.meals.update(cell for cell in islice(self.path, root) if cell in fruits)
+        self.plans += 1
+        self.search_nodes = self.nodes
+        self.search = search
+        self.root = root
+
+    # Function to carry on with the plan being searched, it is dropped if the head gets to where it starts first
+    def continue_plan(self, engine):
+        finished, result = self.run(self.search)
+        if not finished:
+            if self.root <= 0:
+                self.search = None
+                self.fork = None
+                if self.ahead < MAX_PLAN_AHEAD:
+                    self.ahead *= 2
+                else:
+                    self.wait = (self.nodes - self.search_nodes) // SEARCH_NODES_PER_TICK
+            return
+
+        self.search = None
+        self.fork = None
+        if result is None:
+            # Nothing is safe to eat from there yet, keep to the path and pay for the search before trying again
+            self.wait = (self.nodes - self.search_nodes) // SEARCH_NODES_PER_TICK
+            return
+        self.adopt(result, self.root)
+        self.ahead = PLAN_AHEAD
+
+    # Function to follow a search's (path to a fruit, way back to the trail, entry tick of the trail cell it ends on,
+    # cells it eats on) from `root` cells along the path
+    def adopt(self, result, root):
+        path, back, trail, meals = result
+        while len(self.path) > root:
+            self.path.pop()
+        self.path.extend(path)
+        self.path.extend(back)
+        self.fork = root + len(path) if path else None
+        self.trail = trail
+        self.meals.update(meals)
+
+    # Function to make blocked(cell, moves) for the snake as it will be on `tick` with `length` cells, given the cells
+    # the head enters before then. A cell clears once the tail has passed it, and blocked says if it is still under the
+    # snake after the tail has moved that many more times
+    def body_blocked(self, engine, tick, length, entries):
+        grid, entered = engine.grid, self.entered
+
+        def blocked(cell, moves):
+            entry = entries.get(cell)
+            if entry is None:
+                if not grid[cell]:
+                    return False
+                entry = entered[cell]
+            return entry + length > tick + moves
+        return blocked
+
+    # Function to find a shortest path with A*, blocked(cell, moves) says if a cell can't be entered on the tick the tail
+    # has moved that many times. The tail stays put on the ticks one of `fruits` is eaten, so each fruit on the way
+    # makes the body clear a tick later
+    # With trail the search stops at the first cell that was under the snake when it started instead of at goal. The
+    # tail has already left it, so from there the head can follow the cells the tail leaves behind, goal only guides it
+    # A generator that yields whenever the cells for this tick run out and carries on from there when it is resumed,
+    # returns the cells from the one after start up to the end, [] if there is no way there, or None if it gave up after
+    # expanding `limit` cells
+    def a_star(self, engine, start, goal, blocked, fruits=(), trail=False, limit=None):
+        cols = engine.cols
+        goal_x, goal_y = goal % cols, goal // cols
+        came_from = {start: None}
+        cost = {start: 0}
+        eaten = {start: 0} # Fruits eaten on the way to each cell
+        heap = [(0, 0, start)]
+        expanded = 0
+        while heap:
+            self.budget -= 1
+            if self.budget < 0:
+                yield # Out of cells for this tick, carries on from here on the next one
+            f, negative_cost, cell = heappop(heap)
+            if cell != start and (blocked(cell, 0) if trail else cell == goal):
+                path = []
+                while cell != start:
+                    path.append(cell)
+                    cell = came_from[cell]
+                path.reverse()
+                return path
+            if -negative_cost > cost[cell]:
+                continue # Reached this cell more cheaply since it was queued
+            self.nodes += 1
+            expanded += 1
+            if limit is not None and expanded > limit:
+                return None
+
+            next_cost = -negative_cost + 1
+            moves = next_cost - eaten[cell]
+            for neighbour in self.neighbours(engine, cell):
+                if next_cost < cost.get(neighbour, next_cost + 1) and not blocked(neighbour, moves):
+                    cost[neighbour] = next_cost
+                    came_from[neighbour] = cell
+                    eaten[neighbour] = eaten[cell] + (neighbour in fruits)
+                    estimate = abs(neighbour % cols - goal_x) + abs(neighbour // cols - goal_y)
+                    heappush(heap, (next_cost + estimate, -next_cost, neighbour)) # Ties go to the deepest cell
+        return []
+
+    # Function to search for a plan from the end of a route the head will follow: the path to the closest fruit that is
+    # safe to eat and the way from there back onto the trail. A generator like a_star(), returns (path, way back, entry
+    # tick of the trail cell it ends on, cells it eats on), with no way back if there is room to wander after eating,
+    # or None if none of the fruits tried are safe
+    def plan(self, engine, route):
+        start, tick, length, entries, fruits = self.outlook(engine, route)
+        roomy = self.body_blocked(engine, tick, length + SLACK, entries)
+        tight = self.body_blocked(engine, tick, length, entries)
+
+        # On the way to a fruit the other fruits are kept out of the way, the way back may go through them
+        def blocked(cell, moves):
+            if cell in fruits:
+                return cell != goal
+            return body_blocked(cell, moves)
+
+        cols = engine.cols
+        start_x, start_y = start % cols, start // cols
+        closest = sorted(fruits, key=lambda fruit: abs(fruit % cols - start_x) + abs(fruit // cols - start_y))
+        for goal in closest[:FRUITS_TRIED]:
+            # Leave some slack first, only squeezing in right behind the tail if that is the only way there
+            body_blocked = roomy
+            path = yield from self.a_star(engine, start, goal, blocked)
+            if path == []:
+                body_blocked = tight
+                path = yield from self.a_star(engine, start, goal, blocked)
+            if path == []:
+                break # The search went everywhere the head can get to, the fruits further away are out of reach too
+
+            # The snake after eating is worked out from the route, the path and the entry ticks
+            after = dict(entries)
+            after.update((cell, tick + i + 1) for i, cell in enumerate(path))
+            after_blocked = self.body_blocked(engine, tick + len(path), length + 1 + SLACK, after)
+
+            # The way back heads for where the tail will be after eating, the trail starts there. Heading for the tail
+            # of now would search everything between the fruit and the cells the snake has long since left
+            entry = tick + len(path) - length # Tick the cell the tail will be on was entered on
+            i = entry - engine.ticks - 1
+            if i >= 0:
+                tail = route[i] if i < len(route) else path[i - len(route)]
+            else:
+                tail = engine.body[-i - 1]
+
+            # Giving up after twice the snake's length means there is that much room to wander in until the body
+            # has cleared the way, the chase finds the trail again after eating
+            escape = yield from self.a_star(engine, goal, tail, after_blocked, fruits - {goal}, True)
+            if escape:
+                meals = [goal] + [cell for cell in escape if cell in fruits]
+                return path, escape, after.get(escape[-1], self.entered.get(escape[-1])), meals
+        return None
+
+    # Function to search for the way from the end of a route back onto the trail. Heading for the cell the tail is on
+    # now could cut across the cells it leaves on the way and close them off, so the path ends where it first meets
+    # them. It may go through fruits, the search counts them so the body clears later after each one
+    # A generator like plan() that returns no path to a fruit
+    def rejoin(self, engine, route):
+        start, tick, length, entries, fruits = self.outlook(engine, route)
+        back = yield from self.a_star(engine, start, engine.body[-1], self.body_blocked(engine, tick, length, entries),
+                                      fruits, True, 2 * length)
+        if not back:
+            return None # Boxed in, or with so much room the body will have cleared the way by the time it is tried again
+        return [], back, entries.get(back[-1], self.entered.get(back[-1])), [cell for cell in back if cell in fruits]
+
+    # Function to get the cell a route ends on, the tick the head gets there, the snake's length by then, the tick the
+    # head enters each cell of the route on, and the fruits left
+    def outlook(self, engine, route):
+        now = engine.ticks
+        entries = {cell: now + i + 1 for i, cell in enumerate(route)}
+        fruits = {engine.cell(x, y) for x, y in engine.fruits}
+        length = len(engine.body) + len(fruits.intersection(route)) # Fruits on the route are eaten on the way
+        fruits.difference_update(route)
+        return route[-1] if route else engine.body[0], now + len(route), length, entries, fruits
+
+    # Function to head back onto the trail after the game starts or something the plans didn't expect
+    # Until the way back is found the snake stalls into the room there is
+    def chase(self, engine):
+        self.plans += 1
+        finished, result = self.run(self.rejoin(engine, []))
+        if result and (len(result[1]) > 1 or len(engine.body) > 2):
+            self.adopt(result, 0)
+            return
+        if finished:
+            self.stall(engine) # Boxed in until the body moves out of the way, or room to wander until it does
+            return
+
+        # The way back is further than this tick's search, so it is searched from the end of enough stalling for the
+        # longest search to finish while the head gets there, cells queued more than once can take as long again
+        self.stall(engine, 4 * len(engine.body) // NODES_PER_TICK + 2)
+        self.start_search(engine, self.rejoin(engine, list(self.path)), len(self.path))
+
+    # Function to move to where there is the most room, along the walls so the space left isn't cut in two
+    # Further moves, up to `count`, go through cells that are free now, which stay free until the head gets there
+    def stall(self, engine, count=1):
+        options = [cell for cell in self.neighbours(engine, engine.body[0]) if self.is_open(engine, cell)]
+        limit = min(len(engine.body), NODES_PER_TICK) # Counted on top of the searches, it decides if the snake lives
+        best, best_score = None, None
+        for cell in options:
+            free_neighbours = sum(1 for neighbour in self.neighbours(engine, cell) if not engine.grid[neighbour])
+            score = (self.room(engine, cell, limit, options), -free_neighbours)
+            if best is None or score > best_score:
+                best, best_score = cell, score
+        if best is None:
+            return
+        self.path.append(best)
+
+        cell, on_path = best, {best}
+        for _ in range(count - 1):
+            options = [neighbour for neighbour in self.neighbours(engine, cell)
+                       if not engine.grid[neighbour] and neighbour not in on_path]
+            if not options:
+                break
+            cell = min(options, key=lambda option: sum(1 for neighbour in self.neighbours(engine, option)
+                                                       if not engine.grid[neighbour] and neighbour not in on_path))
+            self.path.append(cell)
+            on_path.add(cell)
+
+    # Function to count the free cells reachable from a cell, counting stops at limit
+    # Reaching one of the other cells means they share the same space, so that counts as the limit straight away
+    def room(self, engine, start, limit, others=()):
+        seen = {start}
+        queue = deque([start])
+        while queue and len(seen) < limit:
+            cell = queue.popleft()
+            self.nodes += 1
+            for neighbour in self.neighbours(engine, cell):
+                if neighbour != start and neighbour in others:
+                    return limit
+                if neighbour not in seen and not engine.grid[neighbour]:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return len(seen)
+
+    # Function to get the statistics of the ticks played so far, times in milliseconds
+    def stats(self):
+        times = list(self.tick_times)
+        p50, p99 = percentiles(times, (50, 99))
+        return {
+            "ticks": self.ticks,
+            "plans": self.plans,
+            "nodes": self.nodes,
+            "nodes_per_tick": sum(self.tick_nodes) / len(self.tick_nodes) if self.tick_nodes else 0.0,
+            "ms_mean": sum(times) / len(times) * 1000 if times else 0.0,
+            "ms_p50": p50 * 1000,
+            "ms_p99": p99 * 1000,
+            "ms_max": max(times, default=0.0) * 1000
+        }
+
+# Function to create the autopilot as a policy, like the other policies in policies.py
+def autopilot_policy(engine, seed=None):
+    return Autopilot(engine)
@@ -0,0 +1,164 @@
+# Description: Thousands of snake games stepped together with NumPy, for training bots
+# Imports
+import numpy as np
+
+from snake_engine import BONUS_FRUIT_EVERY, FRUIT_SCORE
+
+# Actions are indices into this list, -1 keeps the current direction
+DIRECTION_NAMES = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+DX = np.array([0, 0, -1, 1], dtype=np.int32)
+DY = np.array([-1, 1, 0, 0], dtype=np.int32)
+OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+
+MAX_SPAWN_TRIES = 8 # Random picks for a fruit before falling back to scanning the free cells
+
+# Batch snake environment class
+# Each game keeps an occupancy grid of the move number at which the head entered each cell. A cell belongs to the
+# snake while that number is within the last `length` moves, which works as a ring buffer of the body: the tail
+# leaves without a pop and growing is just a longer length. Fruits are stored in the same grid as the negative move
+# number they were spawned at. The move counter keeps counting across games, so whatever a finished game left in
+# the grid reads as free and resetting a game never has to clear its grid.
+class BatchSnakeEnv:
+    def __init__(self, num_games, width=800, height=600, grid_size=10, top_bar_height=50, seed=None):
+        self.num_games = num_games
+        self.cols = width // grid_size
+        self.rows = height // grid_size
+        self.top_row = top_bar_height // grid_size
+        self.cells = self.cols * self.rows
+        self.rng = np.random.default_rng(seed)
+
+        self.grid = np.zeros((num_games, self.cells), dtype=np.int32) # Move the head entered a cell, or minus the move a fruit was spawned
+        self.offsets = np.arange(num_games, dtype=np.int64) * self.cells # Start of each game in the flattened grids
+
+        self.head_x = np.zeros(num_games, dtype=np.int32)
+        self.head_y = np.zeros(num_games, dtype=np.int32)
+        self.direction = np.zeros(num_games, dtype=np.int8)
+        self.length = np.zeros(num_games, dtype=np.int32)
+        self.moves = np.zeros(num_games, dtype=np.int32) # Number of cells the head has entered, over all games played in the slot
+        self.first_move = np.zeros(num_games, dtype=np.int32) # Value of moves when the current game started
+        self.score = np.zeros(num_games, dtype=np.int32)
+        self.ticks = np.zeros(num_games, dtype=np.int32)
+
+        # Results of the games that finished on the last step, before they were reset
+        self.final_score = np.zeros(num_games, dtype=np.int32)
+        self.final_ticks = np.zeros(num_games, dtype=np.int32)
+        self.reset()
+
+    # Function to start every game again
+    def reset(self):
+        self.reset_games(np.arange(self.num_games))
+
+    # Function to start the given games again with the same snake as SnakeEngine.reset()
+    def reset_games(self, games):
+        if games.size == 0:
+            return
+        # Skip past every move of the last game so nothing it left behind counts as the snake or a fruit
+        self.moves[games] += 5
+        self.first_move[games] = self.moves[games] - 3
+        start = self.top_row * self.cols + np.arange(10, 6, -1) # The head first, like SnakeEngine
+        self.grid.ravel()[self.offsets[games, None] + start] = self.moves[games, None] - np.arange(4)
+        self.head_x[games] = 10
+        self.head_y[games] = self.top_row
+        self.direction[games] = DIRECTION_NAMES.index('RIGHT')
+        self.length[games] = 4
+        self.score[games] = 0
+        self.ticks[games] = 0
+        self.spawn_fruit(games)
+
+    # Function to check which grid values are part of the snake in the given games
+    def is_snake(self, games, values):
+        return values > self.moves[games] - self.length[games]
+
+    # Function to check which grid values are fruits in the given games
+    def is_fruit(self, games, values):
+        return -values >= self.first_move[games]
+
+    # Function to check which cells are free in the given games
+    def is_free(self, games, cells):
+        values = self.grid.ravel()[self.offsets[games] + cells]
+        return ~self.is_snake(games, values) & ~self.is_fruit(games, values)
+
+    # Function to place one new fruit on a random free cell in each of the given games
+    def spawn_fruit(self, games):
+        pending = games
+        for _ in range(MAX_SPAWN_TRIES):
+            if pending.size == 0:
+                return
+            cells = (self.rng.integers(self.top_row, self.rows, pending.size) * self.cols +
+                     self.rng.integers(0, self.cols, pending.size))
+            free = self.is_free(pending, cells)
+            placed = pending[free]
+            self.grid.ravel()[self.offsets[placed] + cells[free]] = -self.moves[placed]
+            pending = pending[~free]
+
+        # Nearly full boards are scanned so the spawn still lands on a free cell, nothing is placed when the board is full
+        first = self.top_row * self.cols
+        for game in pending:
+            values = self.grid[game, first:]
+            free = np.flatnonzero(~self.is_snake(game, values) & ~self.is_fruit(game, values))
+            if free.size:
+                self.grid[game, first + self.rng.choice(free)] = -self.moves[game]
+
+    # Function to advance every game by one tick, actions holds a direction index or -1 per game
+    # Returns the reward and whether each game ended, finished games are reset straight away
+    def step(self, actions=None):
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions >= 0) & (actions != OPPOSITE.take(self.direction))
+            self.direction = np.where(turn, actions, self.direction)
+
+        x = self.head_x + DX.take(self.direction)
+        y = self.head_y + DY.take(self.direction)
+        self.ticks += 1
+
+        # The snake dies when it runs into the walls or itself, the tail has already moved on unless a fruit is eaten
+        wall = (x < 0) | (x >= self.cols) | (y < self.top_row) | (y >= self.rows)
+        flat = self.offsets + np.where(wall, 0, y * self.cols + x)
+        grid = self.grid.ravel()
+        values = grid[flat]
+        done = wall | (values > self.moves + 1 - self.length)
+        alive = ~done
+        ate = alive & (-values >= self.first_move)
+
+        # Move the heads, this also takes the eaten fruits off the board. Finished games are written too, which is
+        # cheaper than masking them out: their moves didn't advance so the value is stale once they are reset
+        self.moves += alive
+        grid[flat] = self.moves
+        self.head_x = x
+        self.head_y = y
+
+        # Eat fruits, with an extra fruit every time the score reaches a multiple of BONUS_FRUIT_EVERY
+        rewards = ate * np.int32(FRUIT_SCORE)
+        if ate.any():
+            eaters = np.flatnonzero(ate)
+            self.length[eaters] += 1
+            self.score[eaters] += FRUIT_SCORE
+            self.spawn_fruit(eaters)
+            self.spawn_fruit(eaters[self.score[eaters] % BONUS_FRUIT_EVERY == 0])
+
+        if done.any():
+            finished = np.flatnonzero(done)
+            self.final_score[finished] = self.score[finished]
+            self.final_ticks[finished] = self.ticks[finished]
+            self.reset_games(finished)
+
+        return rewards, done
+
+    # Function to get the fruit positions of one game as (x, y) cells
+    def fruit_positions(self, game):
+        cells = np.flatnonzero(self.is_fruit(game, self.grid[game]))
+        return [(int(cell % self.cols), int(cell // self.cols)) for cell in cells]
+
+    # Function to put fruits at the given (x, y) cells of one game, replacing the ones it has
+    def set_fruits(self, game, positions):
+        values = self.grid[game]
+        values[self.is_fruit(game, values)] = 0
+        for x, y in positions:
+            values[y * self.cols + x] = -self.moves[game]
+
+    # Function to get the cells of one game's snake from head to tail as (x, y) cells
+    def body_positions(self, game):
+        values = self.grid[game]
+        cells = np.flatnonzero(self.is_snake(game, values))
+        cells = cells[np.argsort(-values[cells])]
+        return [(int(cell % self.cols), int(cell // self.cols)) for cell in cells]
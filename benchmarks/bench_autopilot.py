@@ -0,0 +1,68 @@
+# Description: Measures how long the autopilot takes to plan each tick and how many cells it searches, up to big boards and long
+# snakes, and checks it still eats
+# Usage: python benchmarks/bench_autopilot.py [--ticks 5000]
+# Imports
+import argparse
+
+import common # Makes the game modules importable
+from autopilot import Autopilot
+from common import long_snake_engine
+from snake_engine import SnakeEngine
+
+# (columns, rows, starting length) of each game, a snake of 4 is how a normal game starts
+GAMES = ((80, 55, 4), (80, 55, 1000), (200, 195, 4), (200, 195, 5000), (500, 495, 4), (500, 495, 20000))
+BUDGET_MS = 1.0 # Planning time allowed per tick on average
+P99_BUDGET_MS = 5.0 # Planning time allowed on the slowest 1% of ticks
+MAX_BUDGET_MS = 20.0 # Planning time allowed on any one tick, a few times the p99 for the odd tick the OS takes the CPU away
+FRUIT_TICKS = 4 # Ticks per column and row of the board the autopilot may take per fruit on average, walking it twice over
+
+# Function to play a game with the autopilot, returns its statistics, the fruits it ate and if it died
+def play(cols, rows, length, ticks):
+    width, height = cols * 10, (rows + 5) * 10 # 5 rows under the top bar
+    if length > 4:
+        engine = long_snake_engine(length, width, height)
+    else:
+        engine = SnakeEngine(width, height)
+        engine.reset(0)
+    autopilot = Autopilot(engine)
+    fruits = 0
+    for _ in range(ticks):
+        engine.move(autopilot(engine))
+        if engine.done:
+            break
+        if engine.last_tail is None:
+            fruits += 1
+    return autopilot.stats(), fruits, engine.done
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the autopilot's planning.")
+    parser.add_argument("--ticks", type=int, default=5000, help="ticks to play on each board once the starting body is gone")
+    args = parser.parse_args()
+
+    print(f"{'board':>9} {'start':>6} {'fruits':>6} {'ticks':>6} {'plans':>6} {'nodes/tick':>10} "
+          f"{'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    over_budget = []
+    starved = []
+    for cols, rows, length in GAMES:
+        # A long snake cuts the board in two on its way to the first fruit, the next one can be out of reach until the
+        # body has moved on, so it plays as many more ticks as it is long
+        stats, fruits, died = play(cols, rows, length, length + args.ticks)
+        print(f"{f'{cols}x{rows}':>9} {length:>6} {fruits:>6} {stats['ticks']:>6} {stats['plans']:>6} "
+              f"{stats['nodes_per_tick']:>10.1f} {stats['ms_mean']:>8.3f} {stats['ms_p50']:>8.3f} "
+              f"{stats['ms_p99']:>8.3f} {stats['ms_max']:>8.3f}{'  died' if died else ''}")
+        expected = max(1, args.ticks // (FRUIT_TICKS * (cols + rows)))
+        if died or fruits < expected:
+            starved.append(f"{cols}x{rows} with {length}: {fruits} fruits in {stats['ticks']} ticks < {expected}"
+                           f"{', died' if died else ''}")
+        if stats["ms_mean"] > BUDGET_MS:
+            over_budget.append(f"{cols}x{rows} with {length}: mean {stats['ms_mean']:.3f} ms > {BUDGET_MS} ms")
+        if stats["ms_p99"] > P99_BUDGET_MS:
+            over_budget.append(f"{cols}x{rows} with {length}: p99 {stats['ms_p99']:.3f} ms > {P99_BUDGET_MS} ms")
+        if stats["ms_max"] > MAX_BUDGET_MS:
+            over_budget.append(f"{cols}x{rows} with {length}: max {stats['ms_max']:.3f} ms > {MAX_BUDGET_MS} ms")
+
+    if over_budget or starved:
+        raise SystemExit("FAILED: planning took too long or the snake didn't eat\n" + "\n".join(over_budget + starved))
+
+if __name__ == "__main__":
+    main()
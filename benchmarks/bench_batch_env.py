@@ -0,0 +1,27 @@
+# Description: Measures how many game steps per second BatchSnakeEnv runs with random actions
+# Usage: python benchmarks/bench_batch_env.py
+# Imports
+import time
+
+import numpy as np
+
+import common # Makes the game modules importable
+from batch_env import BatchSnakeEnv
+
+STEPS = 100
+
+def main():
+    print(f"{'games':>8} {'ms/step':>9} {'steps/s':>12}")
+    for num_games in (1000, 10000, 100000):
+        env = BatchSnakeEnv(num_games, seed=0)
+        actions = np.random.default_rng(0).integers(-1, 4, (STEPS, num_games), dtype=np.int8)
+        env.step(actions[0]) # Warm up
+
+        start = time.perf_counter()
+        for step_actions in actions:
+            env.step(step_actions)
+        elapsed = time.perf_counter() - start
+        print(f"{num_games:>8} {elapsed / STEPS * 1000:>9.3f} {STEPS * num_games / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Description: Measures memory and frame time of the chunk renderer from the usual board up to 10,000x10,000 cells
+# Usage: python benchmarks/bench_board.py
+# Imports
+import os
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Render without opening a window
+
+import common # Makes the game modules importable
+import pygame
+from renderer import CHUNK_CELLS, MAX_CHUNKS, ChunkRenderer
+from snake_engine import SnakeEngine
+
+WIDTH, HEIGHT = 800, 600
+TOP_BAR_HEIGHT = 50
+GRID_SIZE = 10
+FRAMES = 600
+BOARDS = ((80, 60), (1000, 1000), (10000, 10000))
+MEMORY_BUDGET = 64 # Megabytes the engine and the chunk surfaces may use together
+
+# Function to get the moves of a snake going down and up the board one column at a time, it never dies on these boards
+def zigzag_moves(count):
+    moves = []
+    while len(moves) < count:
+        moves += ['DOWN'] * 40 + ['RIGHT'] + ['UP'] * 40 + ['RIGHT']
+    return moves[:count]
+
+# Function to play a game on a board with the chunk renderer, returns (frame times, engine bytes, chunk bytes)
+def play(win, cols, rows, frames=FRAMES):
+    def draw_top_bar(win, elapsed_time, score):
+        pygame.draw.rect(win, "#13780A", (0, 0, WIDTH, TOP_BAR_HEIGHT))
+
+    tracemalloc.start()
+    engine = SnakeEngine(cols * GRID_SIZE, rows * GRID_SIZE, GRID_SIZE, TOP_BAR_HEIGHT)
+    engine.reset(0)
+    engine_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    renderer = ChunkRenderer(win, GRID_SIZE, (225, 225, 225), "#1DB30E", TOP_BAR_HEIGHT, draw_top_bar)
+    times = []
+    for move in zigzag_moves(frames // 2):
+        engine.move(move)
+        for progress in (0.0, 0.5): # Two frames per tick, like the game at 60 frames per second and 30 ticks
+            start = time.perf_counter()
+            renderer.draw(engine, 0, progress)
+            times.append(time.perf_counter() - start)
+    chunk_bytes = len(renderer.chunks) * (CHUNK_CELLS * GRID_SIZE) ** 2 * win.get_bytesize()
+    return times, engine_bytes, chunk_bytes
+
+def main():
+    pygame.display.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"chunks of {CHUNK_CELLS}x{CHUNK_CELLS} cells, at most {MAX_CHUNKS} kept")
+    print(f"{'board':>12} {'engine MB':>10} {'chunks MB':>10} {'p50 ms':>8} {'p99 ms':>8} {'spawn us':>9}")
+    over_budget = False
+    for cols, rows in BOARDS:
+        times, engine_bytes, chunk_bytes = play(win, cols, rows)
+        times.sort()
+
+        engine = SnakeEngine(cols * GRID_SIZE, rows * GRID_SIZE, GRID_SIZE, TOP_BAR_HEIGHT)
+        start = time.perf_counter()
+        for _ in range(2000):
+            x, y = engine.spawn_fruit()
+            engine.fruits.pop()
+            engine.free.add(engine.cell(x, y))
+        spawn = (time.perf_counter() - start) / 2000
+
+        megabytes = (engine_bytes + chunk_bytes) / 1e6
+        over_budget = over_budget or megabytes > MEMORY_BUDGET
+        print(f"{f'{cols}x{rows}':>12} {engine_bytes / 1e6:>10.1f} {chunk_bytes / 1e6:>10.1f} "
+              f"{statistics.median(times) * 1000:>8.3f} {times[len(times) * 99 // 100] * 1000:>8.3f} {spawn * 1e6:>9.2f}")
+
+    pygame.quit()
+    if over_budget:
+        raise SystemExit(f"FAILED: a board used more than {MEMORY_BUDGET} MB")
+
+if __name__ == "__main__":
+    main()
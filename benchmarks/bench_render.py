@@ -0,0 +1,54 @@
+# Description: Compares the full redraw renderer with the dirty rectangle renderer
+# Usage: python benchmarks/bench_render.py
+# Imports
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Render without opening a window
+
+import pygame
+
+from common import cycle_policy, long_snake_engine
+from renderer import DirtyRenderer, FullRenderer
+
+WIDTH, HEIGHT = 800, 600
+TOP_BAR_HEIGHT = 50
+GRID_SIZE = 10
+FRAMES = 300
+
+# Function to time a renderer over a number of frames, returns the time per frame and the final picture
+def time_renderer(renderer_class, win, length, draw_top_bar):
+    engine = long_snake_engine(length)
+    policy = cycle_policy(engine)
+    renderer = renderer_class(win, GRID_SIZE, (225, 225, 225), "#1DB30E", TOP_BAR_HEIGHT, draw_top_bar)
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        engine.step(policy(engine))
+        renderer.draw(engine, 12.5)
+    elapsed = time.perf_counter() - start
+    return elapsed / FRAMES, pygame.image.tostring(win, "RGB")
+
+def main():
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    font = pygame.font.Font(None, 26)
+
+    # Same work as draw_top_bar() in the game
+    def draw_top_bar(win, elapsed_time, score):
+        pygame.draw.rect(win, "#13780A", (0, 0, WIDTH, TOP_BAR_HEIGHT))
+        win.blit(font.render(f"Time: {elapsed_time:.1f}", 1, "white"), (10, 5))
+        win.blit(font.render(f"Score: {score}", 1, "white"), (700, 5))
+
+    print(f"{'length':>8} {'full ms':>10} {'dirty ms':>10} {'speedup':>8}")
+    for length in (10, 100, 1000, 4000):
+        full, full_picture = time_renderer(FullRenderer, win, length, draw_top_bar)
+        dirty, dirty_picture = time_renderer(DirtyRenderer, win, length, draw_top_bar)
+        if full_picture != dirty_picture:
+            raise AssertionError(f"The renderers drew different frames for a snake of {length} segments")
+        print(f"{length:>8} {full * 1000:>10.3f} {dirty * 1000:>10.3f} {full / dirty:>7.1f}x")
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Description: Measures how long the game takes to start, in new processes with and without a window
+# Usage: python benchmarks/bench_startup.py [--runs 5]
+# Imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GAME = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snakegame.py")
+STEPS = ("imports", "display", "fonts", "first_frame", "total")
+
+# Function to start the game in a new process until its first frame, returns the times or None if it couldn't start
+def start_once(home, headless):
+    command = [sys.executable, GAME, "--startup-time"] + (["--headless"] if headless else [])
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=dict(os.environ, HOME=home))
+    process_time = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    times = json.loads(result.stdout.strip().splitlines()[-1])
+    times["process"] = process_time # Includes starting Python itself
+    return times
+
+# Function to measure one way of starting, cold runs look the font up again and warm runs use the saved answer
+def measure(headless, cold, runs):
+    home = tempfile.mkdtemp() # Keeps the font cache of the benchmark apart from the player's
+    font_cache = os.path.join(home, ".snake_fonts.json")
+    start_once(home, headless) # Warm up the operating system's file cache
+    results = []
+    for _ in range(runs):
+        if cold and os.path.exists(font_cache):
+            os.remove(font_cache)
+        times = start_once(home, headless)
+        if times is None:
+            return None
+        results.append(times)
+    return {step: statistics.median(times[step] for times in results) for step in STEPS + ("process",)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long the game takes to start.")
+    parser.add_argument("--runs", type=int, default=5, help="starts measured for each way of starting")
+    args = parser.parse_args()
+
+    print(f"{'mode':<16}" + "".join(f"{step:>13}" for step in STEPS + ("process",)) + "   (median ms)")
+    for headless in (True, False):
+        for cold in (True, False):
+            name = f"{'headless' if headless else 'window'} {'cold' if cold else 'warm'}"
+            times = measure(headless, cold, args.runs)
+            if times is None:
+                print(f"{name:<16} could not open a window")
+                continue
+            print(f"{name:<16}" + "".join(f"{times[step] * 1000:>13.1f}" for step in STEPS + ("process",)))
+
+if __name__ == "__main__":
+    main()
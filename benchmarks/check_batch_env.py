@@ -0,0 +1,77 @@
+# Description: Plays the same games on BatchSnakeEnv and on SnakeEngine side by side and checks they agree on every tick:
+#              rewards, deaths, scores, the snake's body and the number of fruits. The two spawn fruits with different
+#              random numbers, so the batch is given the engine's fruits whenever they change
+# Usage: python benchmarks/check_batch_env.py [--games 200] [--ticks 3000]
+# Imports
+import argparse
+import random
+
+import common # Makes the game modules importable
+from batch_env import DIRECTION_NAMES, BatchSnakeEnv
+from policies import greedy_policy
+from snake_engine import SnakeEngine
+
+MAX_FAILURES = 20 # Mismatches listed before giving up, the first one is usually all it takes
+
+def main():
+    parser = argparse.ArgumentParser(description="Check BatchSnakeEnv against SnakeEngine.")
+    parser.add_argument("--games", type=int, default=200, help="games stepped together")
+    parser.add_argument("--ticks", type=int, default=3000, help="ticks to step them for")
+    args = parser.parse_args()
+
+    env = BatchSnakeEnv(args.games, seed=0)
+    engines = [SnakeEngine() for _ in range(args.games)]
+    # Half the games chase the fruits so the snakes grow long enough to run into themselves, the other half turn at
+    # random and mostly hit the walls, which resets them often
+    policies = [greedy_policy(engine) if game % 2 == 0 else None for game, engine in enumerate(engines)]
+    rng = random.Random(0)
+    for game, engine in enumerate(engines):
+        engine.reset(game)
+        env.set_fruits(game, engine.fruits)
+    seeds = args.games # Seed of the next game to start
+
+    failures = []
+    played = fruits = 0
+    for tick in range(args.ticks):
+        actions, engine_rewards = [], []
+        for game, engine in enumerate(engines):
+            action = policies[game](engine) if policies[game] else rng.choice(DIRECTION_NAMES + [None])
+            actions.append(DIRECTION_NAMES.index(action) if action else -1)
+            engine_rewards.append(engine.move(action))
+        rewards, done = env.step(actions)
+
+        for game, engine in enumerate(engines):
+            where = f"game {game} tick {engine.ticks} (batch tick {tick + 1})"
+            reward = engine_rewards[game]
+            fruits += reward > 0
+            if bool(done[game]) != engine.done:
+                failures.append(f"{where}: the batch {'ended' if done[game] else 'carried on'}")
+            elif engine.done:
+                if env.final_score[game] != engine.score or env.final_ticks[game] != engine.ticks:
+                    failures.append(f"{where}: the batch ended with score {env.final_score[game]} after "
+                                    f"{env.final_ticks[game]} ticks, the engine with {engine.score} after {engine.ticks}")
+                played += 1
+                engine.reset(seeds)
+                seeds += 1
+                env.set_fruits(game, engine.fruits)
+            else:
+                if rewards[game] != reward or env.score[game] != engine.score:
+                    failures.append(f"{where}: reward {rewards[game]} and score {env.score[game]} in the batch, "
+                                    f"{reward} and {engine.score} in the engine")
+                elif env.body_positions(game) != list(engine.body_positions()):
+                    failures.append(f"{where}: the bodies differ")
+                elif len(env.fruit_positions(game)) != len(engine.fruits):
+                    failures.append(f"{where}: {len(env.fruit_positions(game))} fruits in the batch, "
+                                    f"{len(engine.fruits)} in the engine")
+                elif reward:
+                    env.set_fruits(game, engine.fruits)
+            if len(failures) >= MAX_FAILURES:
+                raise SystemExit("FAILED:\n" + "\n".join(failures))
+
+    print(f"{args.games} games for {args.ticks} ticks, {played} finished and {fruits} fruits eaten")
+    if failures:
+        raise SystemExit("FAILED:\n" + "\n".join(failures))
+    print("OK: the batch matched the engine on every tick")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# Description: Helpers shared by the benchmarks
+# Imports
+import os
+import sys
+
+# Let the benchmarks import the game modules from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from policies import cycle_policy, cycle_positions, direction_to
+from snake_engine import SnakeEngine
+
+# Function to create an engine with a snake of the given length lying along the cycle
+def long_snake_engine(length, width=800, height=600, grid_size=10, top_bar_height=50, seed=0):
+    engine = SnakeEngine(width, height, grid_size, top_bar_height)
+    engine.reset(seed)
+    positions = cycle_positions(engine)
+    if length > len(positions) - 1:
+        raise ValueError(f"A snake of {length} segments doesn't fit on a {engine.cols}x{engine.rows} board")
+
+    # The head goes first, so walk the cycle backwards from where the head is
+    body = [positions[(length - 1 - i) % len(positions)] for i in range(length)]
+    engine.place_snake(body, direction_to(body[1], body[0]))
+    return engine
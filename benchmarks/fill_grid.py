@@ -0,0 +1,48 @@
+# Description: Plays games on a small board along a cycle until the snake fills every cell, checking that fruits never
+#              spawn on the snake and that none are left over once the board is full
+# Usage: python benchmarks/fill_grid.py [--seeds 200]
+# Imports
+import argparse
+
+import common # Makes the game modules importable
+from common import cycle_policy
+from snake_engine import SnakeEngine
+
+COLS, ROWS = 12, 12 # Cells of the board under the top bar, an even number of columns so the cycle closes
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a small board with the snake on many seeds.")
+    parser.add_argument("--seeds", type=int, default=200, help="games to play, one per seed")
+    args = parser.parse_args()
+
+    engine = SnakeEngine(COLS * 10, ROWS * 10 + 50, 10, 50)
+    cells = COLS * ROWS
+    failures = []
+    filled = 0
+    for seed in range(args.seeds):
+        engine.reset(seed)
+        policy = cycle_policy(engine)
+        on_snake = 0 # Ticks a fruit was on a cell of the snake
+        while not engine.done and len(engine.body) < cells:
+            engine.move(policy(engine))
+            on_snake += any(engine.grid[engine.cell(x, y)] for x, y in engine.fruits)
+            if len(engine.free) + len(engine.body) + len(engine.fruits) != cells:
+                failures.append(f"seed {seed}: the free cells were miscounted on tick {engine.ticks}")
+                break
+
+        if engine.done or len(engine.body) != cells:
+            failures.append(f"seed {seed}: died at length {len(engine.body)} of {cells}")
+        elif engine.fruits or len(engine.free):
+            failures.append(f"seed {seed}: {len(engine.fruits)} fruits and {len(engine.free)} free cells left on a full board")
+        else:
+            filled += 1
+        if on_snake:
+            failures.append(f"seed {seed}: a fruit was on the snake on {on_snake} ticks")
+
+    print(f"{args.seeds} games on a {COLS}x{ROWS} board, {filled} filled it")
+    if failures:
+        raise SystemExit("FAILED:\n" + "\n".join(failures))
+    print("OK: every game filled the board without a fruit landing on the snake")
+
+if __name__ == "__main__":
+    main()
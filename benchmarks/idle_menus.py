@@ -0,0 +1,62 @@
+# Description: Measures how much CPU the menu screens use while they sit waiting for input
+# Usage: python benchmarks/idle_menus.py [--seconds 5]
+# Imports
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import common # Makes the game modules importable
+import pygame
+import snakegame
+from score_store import HighScoreStore
+
+MAX_CPU = 0.05 # Most of a core a menu may use while idle
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the CPU the menu screens use while idle.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="time to leave each screen idle")
+    args = parser.parse_args()
+
+    snakegame.high_scores = HighScoreStore(os.path.join(tempfile.mkdtemp(), "idle_scores.db"))
+    win = snakegame.init_display(headless=True) # No window is needed to wait for input
+
+    # Count the frames each screen draws
+    frames = 0
+    update = pygame.display.update
+
+    def counted_update(*rects):
+        nonlocal frames
+        frames += 1
+        return update(*rects)
+
+    pygame.display.update = counted_update
+
+    screens = {
+        "home": lambda: snakegame.home_screen(win),
+        "game over": lambda: snakegame.end_screen(win, 83.4, 120),
+        "confirm reset": lambda: snakegame.confirm_reset_screen(win)
+    }
+
+    print(f"{'screen':<14} {'cpu':>7} {'frames/s':>9}")
+    failed = False
+    for name, screen in screens.items():
+        # Close the window from another thread once the screen has been left alone for long enough
+        timer = threading.Timer(args.seconds, pygame.event.post, (pygame.event.Event(pygame.QUIT),))
+        frames = 0
+        pygame.event.clear()
+        timer.start()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        screen()
+        cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        print(f"{name:<14} {cpu:>7.1%} {frames / args.seconds:>9.1f}")
+        failed = failed or cpu > MAX_CPU
+
+    pygame.quit()
+    if failed:
+        raise SystemExit(f"FAILED: a menu used more than {MAX_CPU:.0%} of a core while idle")
+    print("OK: the menus sleep while they wait for input")
+
+if __name__ == "__main__":
+    main()
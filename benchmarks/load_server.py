@@ -0,0 +1,186 @@
+# Description: Load generator for server.py, plays hundreds of games at once over localhost and reports how many
+#              sessions one core of the server can run and how steady its ticks are
+# Usage: python benchmarks/load_server.py [--sessions 100,300,500] [--seconds 20] [--random-turns 0.3]
+# Imports
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+from collections import deque
+
+import common # Makes the game modules importable
+from replay import DIRECTION_CODES
+from server import CELL, DIED, END, FRUIT_SHIFT, GREW, MAGIC, START, board_checksum
+from snake_engine import DIRECTIONS, FRUIT_SCORE, OPPOSITES
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+WARMUP = 3 # Seconds of each run that aren't counted, while the sessions connect
+
+# Load client class, plays one game and keeps its own copy of the board up to date from the server's deltas
+class LoadClient(asyncio.Protocol):
+    def __init__(self, load):
+        self.load = load
+        self.transport = None
+        self.buffer = bytearray()
+        self.started = False
+        self.body = deque()
+        self.occupied = set()
+        self.fruits = set()
+        self.score = 0
+        self.ticks = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        self.load.bytes_received += len(data)
+        if not self.started:
+            if len(self.buffer) < START.size:
+                return
+            magic, version, seed, self.cols, self.rows, self.top_row, code, length, fruits = START.unpack_from(self.buffer)
+            if len(self.buffer) < START.size + (length + fruits) * CELL.size:
+                return
+            if magic != MAGIC:
+                raise ValueError("not a snake server")
+            cells = [CELL.unpack_from(self.buffer, START.size + i * CELL.size)[0] for i in range(length + fruits)]
+            self.body.extend(cells[:length])
+            self.occupied.update(cells[:length])
+            self.fruits.update(cells[length:])
+            self.direction = DIRECTION_CODES[code]
+            del self.buffer[:START.size + (length + fruits) * CELL.size]
+            self.started = True
+
+        # Apply every complete record
+        position = 0
+        while position < len(self.buffer):
+            record = self.buffer[position]
+            size = 1 + (record >> FRUIT_SHIFT & 3) * CELL.size + (END.size if record & DIED else 0)
+            if position + size > len(self.buffer):
+                break
+            self.apply(record, self.buffer, position + 1)
+            position += size
+        del self.buffer[:position]
+        if not (self.started and self.ticks and self.transport) or self.transport.is_closing():
+            return
+        self.steer()
+
+    # Function to apply one record to the copy of the board
+    def apply(self, record, buffer, position):
+        self.ticks += 1
+        self.direction = DIRECTION_CODES[record & 3]
+        dx, dy = DIRECTIONS[self.direction]
+        x, y = self.body[0] % self.cols + dx, self.body[0] // self.cols + dy
+        head = y * self.cols + x
+        if record & DIED:
+            # The engine leaves the snake where it was when it hits a wall, and moves it into itself otherwise
+            if 0 <= x < self.cols and self.top_row <= y < self.rows:
+                self.body.pop()
+                self.body.appendleft(head)
+            score, ticks, length, checksum = END.unpack_from(buffer, position)
+            self.load.finish(score == self.score and ticks == self.ticks and length == len(self.body)
+                             and checksum == board_checksum(self.body, self.fruits))
+            self.transport.close()
+            return
+
+        if record & GREW:
+            self.fruits.discard(head)
+            self.score += FRUIT_SCORE
+            for i in range(record >> FRUIT_SHIFT & 3):
+                self.fruits.add(CELL.unpack_from(buffer, position + i * CELL.size)[0])
+        else:
+            self.occupied.discard(self.body.pop())
+        self.body.appendleft(head)
+        self.occupied.add(head)
+
+    # Function to turn towards the closest fruit without running into anything, like the greedy policy
+    # Now and then it turns at random instead, so the games also end by running into walls and the body
+    def steer(self):
+        if self.load.random_turns and self.load.rng.random() < self.load.random_turns:
+            self.transport.write(bytes([self.load.rng.randrange(len(DIRECTION_CODES))]))
+            return
+        cols = self.cols
+        head_x, head_y = self.body[0] % cols, self.body[0] // cols
+        best, best_distance = None, None
+        for direction, (dx, dy) in DIRECTIONS.items():
+            x, y = head_x + dx, head_y + dy
+            if direction == OPPOSITES[self.direction] or not (0 <= x < cols and self.top_row <= y < self.rows):
+                continue
+            cell = y * cols + x
+            if cell in self.occupied and cell != self.body[-1]:
+                continue
+            distance = min((abs(x - fruit % cols) + abs(y - fruit // cols) for fruit in self.fruits), default=0)
+            if best is None or distance < best_distance:
+                best, best_distance = direction, distance
+        if best is not None and best != self.direction:
+            self.transport.write(bytes([DIRECTION_CODES.index(best)]))
+
+    def connection_lost(self, exc):
+        self.load.connections -= 1
+
+# Load class, keeps a number of games going and starts a new one whenever one ends
+class Load:
+    def __init__(self, host, port, sessions, random_turns=0.0, seed=None):
+        self.host, self.port = host, port
+        self.sessions = sessions
+        self.random_turns = random_turns # Chance of each tick that a client turns at random instead of steering
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.games = 0
+        self.mismatches = 0 # Games whose copy on the client didn't end with the server's score, ticks and board
+        self.bytes_received = 0
+
+    # Function to count a finished game
+    def finish(self, matched):
+        self.games += 1
+        self.mismatches += not matched
+
+    # Function to keep the sessions going until the time is up
+    async def run(self, seconds):
+        loop = asyncio.get_running_loop()
+        end = loop.time() + seconds
+        while loop.time() < end:
+            while self.connections < self.sessions:
+                self.connections += 1
+                await loop.create_connection(lambda: LoadClient(self), self.host, self.port)
+            await asyncio.sleep(0.05)
+
+# Function to start a server in its own process, returns the process and its port
+def start_server(seconds):
+    process = subprocess.Popen([sys.executable, SERVER_PATH, "--port", "0", "--duration", str(WARMUP + seconds),
+                                "--warmup", str(WARMUP), "--report", str(seconds)], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        raise SystemExit(f"the server didn't start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many games at once against the game server.")
+    parser.add_argument("--sessions", default="100,300,500", help="comma separated numbers of games to keep going")
+    parser.add_argument("--seconds", type=float, default=20.0, help="seconds to measure each number of games for")
+    parser.add_argument("--random-turns", type=float, default=0.0, help="chance of each tick that a client turns at random")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'games':>6} {'bad':>4} {'cores':>6} {'per core':>9} {'B/move':>7} "
+          f"{'jitter p50':>10} {'p99':>7} {'max':>7} {'pass p50':>9} {'p99':>7}")
+    for sessions in (int(count) for count in args.sessions.split(",")):
+        process, port = start_server(args.seconds)
+        load = Load("127.0.0.1", port, sessions, args.random_turns)
+        asyncio.run(load.run(args.seconds + WARMUP))
+
+        # The first report covers the warm up and the second one the time that was measured
+        reports = [json.loads(line) for line in process.stdout]
+        process.wait()
+        stats = reports[-1]
+        jitter, pass_ms = stats["jitter_ms"], stats["pass_ms"]
+        print(f"{sessions:>8} {load.games:>6} {load.mismatches:>4} {stats['cores']:>6.2f} {stats['sessions_per_core']:>9.0f} "
+              f"{stats['bytes_per_move']:>7.2f} {jitter['p50']:>10.2f} {jitter['p99']:>7.2f} {jitter['max']:>7.2f} "
+              f"{pass_ms['p50']:>9.2f} {pass_ms['p99']:>7.2f}")
+        if load.mismatches:
+            raise SystemExit(f"FAILED: {load.mismatches} games didn't match the server's result")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Description: Plays many headless games through the scene loop and checks the stack depth and live objects stay flat
+# Usage: python benchmarks/soak_scenes.py [--games 100000]
+# Imports
+import argparse
+import gc
+import os
+import sys
+import tempfile
+
+import common # Makes the game modules importable
+import pygame
+import snakegame
+from scenes import CONFIRM_RESET, GAME_OVER, HOME, PLAYING, run_scenes
+from snake_engine import START_SPEED
+from text_cache import render_text
+
+# Function to count the frames on the call stack
+def stack_depth():
+    frame, depth = sys._getframe(1), 0
+    while frame:
+        frame, depth = frame.f_back, depth + 1
+    return depth
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test of the scene loop with headless games.")
+    parser.add_argument("--games", type=int, default=100000)
+    args = parser.parse_args()
+
+    # The real screens draw into a hidden window and keep their scores and replays in a folder of their own
+    folder = tempfile.mkdtemp()
+    snakegame.high_scores_path = os.path.join(folder, "soak_scores.db")
+    snakegame.legacy_high_scores_path = os.path.join(folder, "soak_scores.json")
+    snakegame.replays_path = os.path.join(folder, "replays")
+    win = snakegame.init_display(headless=True)
+
+    # The dummy video driver has no mouse, so the screens are told the mouse is wherever the last click was posted
+    mouse = [(0, 0)]
+    pygame.mouse.get_pos = lambda: mouse[0]
+
+    def click(x, y):
+        mouse[0] = (x, y)
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(x, y)))
+
+    def type_key(char):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=ord(char), unicode=char, mod=0, scancode=0))
+
+    # Middle of each button, worked out like the screens place them
+    high_scores_width = render_text(snakegame.H1_FONT, "High Scores", snakegame.TEXT_COLOR).get_width()
+    start_button = (snakegame.WIDTH // 2, 325)
+    restart_button = (125, 525)
+    main_button = (snakegame.WIDTH // 2 - high_scores_width // 2 + 100, 525)
+    reset_button = (750 - high_scores_width + 112, 525)
+    yes_button, no_button = (200, 425), (600, 425)
+
+    games = 0
+    resets = 0
+    depths = set()
+    samples = [] # (games played, live Python objects)
+    sample_every = max(1, args.games // 10)
+
+    # Type a name and press start
+    def home():
+        type_key("p")
+        click(*start_button)
+        return snakegame.home_screen(win)
+
+    # The real game loop plays straight ahead into the wall, with frames as far apart as the most ticks a frame may
+    # simulate so it doesn't wait for the clock. A hundred players keep the high scores from staying at one row
+    def playing():
+        nonlocal games
+        snakegame.player_name = f"p{games % 100}"
+        next_scene = snakegame.main(win, lambda: snakegame.MAX_TICKS_PER_FRAME / START_SPEED)
+        games += 1
+        depths.add(stack_depth())
+        if games % sample_every == 0:
+            samples.append((games, len(gc.get_objects())))
+        return next_scene
+
+    # Take every way out of the end screen in turn, and close the window after the last game
+    def game_over():
+        if games >= args.games:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        else:
+            click(*(restart_button, main_button, reset_button)[games % 3])
+        return snakegame.end_screen(win, *snakegame.last_game)
+
+    # Say no every other time, and yes the time after
+    def confirm_reset():
+        nonlocal resets
+        resets += 1
+        click(*(no_button if resets % 2 else yes_button))
+        return snakegame.confirm_reset_screen(win)
+
+    run_scenes({HOME: home, PLAYING: playing, GAME_OVER: game_over, CONFIRM_RESET: confirm_reset})
+    pygame.quit()
+
+    print(f"{games} games, {resets} resets, stack depth while playing: {sorted(depths)}")
+    for played, objects in samples:
+        print(f"{played:>8} games {objects:>10} live objects")
+    growth = samples[-1][1] - samples[0][1]
+    if games != args.games or len(depths) != 1 or growth > 1000:
+        raise SystemExit(f"FAILED: {games} games played, or the stack or memory grew ({growth} more live objects)")
+    print("OK: constant stack depth and live objects")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# Description: Runs the benchmarks of the game's hot paths, saves the results as JSON and compares them with a baseline
+# Usage: python benchmarks/suite.py [--only tick,spawn,...] [--json results.json] [--save-baseline] [--threshold 0.25]
+# Imports
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy" # Every benchmark runs without a display
+
+import common # Makes the game modules importable
+import pygame
+from bench_autopilot import play as play_autopilot
+from bench_board import play as play_board
+from bench_startup import measure as measure_startup
+from common import cycle_policy, long_snake_engine
+from renderer import DirtyRenderer, FullRenderer
+from replay import ReplayWriter
+from score_store import HighScoreStore
+from snake_engine import SnakeEngine
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.25 # A result this much slower than the baseline is a regression
+REPEATS = 7 # Each measurement is repeated and the fastest kept, the slower ones are noise from the rest of the system
+
+# Function to time a function that does `count` operations, returns the best microseconds per operation
+# The garbage collector is paused while timing, like timeit does, so its pauses don't land in random benchmarks
+def best_time(function, count, repeats=REPEATS):
+    best = None
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        gc.enable()
+    return best / count * 1e6
+
+# Function to get the moves of the scripted policy for a snake, so playing them back doesn't time the policy
+def cycle_moves(engine, count):
+    snapshot = engine.snapshot()
+    policy = cycle_policy(engine)
+    moves = []
+    for _ in range(count):
+        moves.append(policy(engine))
+        engine.move(moves[-1])
+    engine.restore(snapshot)
+    return moves
+
+# Tick throughput of the game loop, a tick is engine.step() plus recording the move for the replay
+def bench_tick():
+    engine = long_snake_engine(100)
+    snapshot = engine.snapshot()
+    moves = cycle_moves(engine, 20000)
+
+    def steps():
+        engine.restore(snapshot)
+        for move in moves:
+            engine.step(move)
+
+    results = {"tick.step": best_time(steps, len(moves))}
+    with tempfile.TemporaryDirectory() as folder:
+        recorder = ReplayWriter(os.path.join(folder, "bench.snkr"), engine)
+
+        def recorded_steps():
+            engine.restore(snapshot)
+            for move in moves:
+                engine.step(move)
+                recorder.record(engine.direction)
+
+        results["tick.step_and_record"] = best_time(recorded_steps, len(moves))
+        recorder.close(0, 0)
+    return results
+
+# Cost of spawning a fruit as the board fills up, each spawn is undone so the fill level stays the same
+def bench_spawn():
+    results = {}
+    for fill in (10, 50, 90, 99):
+        board = SnakeEngine()
+        engine = long_snake_engine(board.cols * (board.rows - board.top_row) * fill // 100)
+        for x, y in engine.fruits:
+            engine.free.add(engine.cell(x, y))
+        engine.fruits.clear()
+
+        def spawns():
+            for _ in range(10000):
+                x, y = engine.spawn_fruit()
+                engine.fruits.pop()
+                engine.free.add(engine.cell(x, y))
+
+        results[f"spawn.fill_{fill}"] = best_time(spawns, 10000)
+    return results
+
+# Cost of a tick as the snake gets longer, the self collision check is part of every tick
+def bench_collision():
+    results = {}
+    for length in (10, 100, 1000, 10000):
+        engine = long_snake_engine(length, width=1200, height=1000) # Big enough for 10,000 segments
+        snapshot = engine.snapshot()
+        moves = cycle_moves(engine, 20000)
+        move = engine.move
+
+        def ticks():
+            engine.restore(snapshot)
+            for action in moves:
+                move(action)
+
+        results[f"collision.length_{length}"] = best_time(ticks, len(moves))
+    return results
+
+# Cost of a whole frame with each renderer, and of the top bar on its own
+# A fast snake moves several ticks between frames, those frames are timed too
+def bench_render():
+    import snakegame
+
+    win = snakegame.init_display(headless=True)
+    results = {}
+    for length in (100, 1000):
+        for name, renderer_class in (("full", FullRenderer), ("dirty", DirtyRenderer)):
+            for ticks in (1, 4):
+                engine = long_snake_engine(length)
+                snapshot = engine.snapshot()
+                moves = cycle_moves(engine, 200 * ticks)
+                renderer = renderer_class(win, snakegame.GRID_SIZE, snakegame.BG_COLOR, snakegame.TEXT_COLOR,
+                                          snakegame.TOP_BAR_HEIGHT, snakegame.draw_top_bar)
+
+                def frames():
+                    engine.restore(snapshot)
+                    renderer.reset()
+                    changes = []
+                    for i, move in enumerate(moves):
+                        engine.move(move)
+                        changes.append((engine.head(), engine.last_tail))
+                        if len(changes) == ticks:
+                            renderer.draw(engine, i / 60, 0.5, changes)
+                            changes = []
+
+                suffix = f"_{ticks}_ticks" if ticks > 1 else "" # One tick a frame keeps the names older baselines use
+                results[f"render.{name}_length_{length}{suffix}"] = best_time(frames, len(moves) // ticks)
+
+    # The timer changes every frame and the score now and then, like in a game
+    def top_bars():
+        for i in range(2000):
+            snakegame.draw_top_bar(win, i / 60, i // 100 * 10)
+
+    results["render.top_bar"] = best_time(top_bars, 2000)
+    return results
+
+# Cost of opening the high scores, saving a score and reading the top five as the number of players grows
+def bench_high_scores():
+    results = {}
+    for players in (100, 10000, 100000):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "scores.db")
+            store = HighScoreStore(path)
+            rng = random.Random(players)
+            store.submit_many((f"player{i}", rng.randrange(100000)) for i in range(players))
+            store.close()
+
+            # Load: open the store and read what the end screen shows
+            def loads():
+                for _ in range(20):
+                    store = HighScoreStore(path)
+                    store.top(5)
+                    store.close()
+
+            results[f"high_scores.load_{players}"] = best_time(loads, 20)
+
+            store = HighScoreStore(path)
+            scores = iter(range(100000, 10**9))
+
+            # Save: a new best score for a random player, which also invalidates the cached top five
+            def saves():
+                for i in range(200):
+                    store.submit(f"player{rng.randrange(players)}", next(scores))
+                    store.top(5)
+
+            results[f"high_scores.save_{players}"] = best_time(saves, 200)
+            store.close()
+    return results
+
+# Frame time of the chunk renderer, which should be the same on every size of board
+def bench_board():
+    import snakegame
+
+    win = snakegame.init_display(headless=True)
+    results = {}
+    for cols, rows in ((80, 60), (10000, 10000)):
+        times, engine_bytes, chunk_bytes = play_board(win, cols, rows)
+        times.sort()
+        results[f"board.frame_p50_{cols}x{rows}"] = times[len(times) // 2] * 1e6
+    return results
+
+# Planning time of the autopilot per tick, on the usual board and on a big one with a long snake
+def bench_autopilot():
+    results = {}
+    for cols, rows, length in ((80, 55, 4), (200, 195, 5000)):
+        stats, end_length, died = play_autopilot(cols, rows, length, 3000)
+        results[f"autopilot.tick_{cols}x{rows}_length_{length}"] = stats["ms_mean"] * 1000
+    return results
+
+# Time from starting a new Python process to the first frame of the home screen
+def bench_startup():
+    times = measure_startup(headless=True, cold=False, runs=REPEATS)
+    return {"startup.headless_first_frame": times["total"] * 1e6, "startup.headless_process": times["process"] * 1e6}
+
+# Benchmarks by name, each one returns {result name: microseconds per operation}
+BENCHMARKS = {
+    "tick": bench_tick,
+    "spawn": bench_spawn,
+    "collision": bench_collision,
+    "render": bench_render,
+    "high_scores": bench_high_scores,
+    "board": bench_board,
+    "autopilot": bench_autopilot,
+    "startup": bench_startup
+}
+
+# Function to compare results with a baseline, returns the names of the results that got slower than the threshold allows
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'benchmark':<36} {'us/op':>12} {'baseline':>12} {'change':>8}")
+    for name, value in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<36} {value:>12.3f} {'-':>12} {'new':>8}")
+            continue
+        change = (value - old) / old
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<36} {value:>12.3f} {old:>12.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths and compare them with a baseline.")
+    parser.add_argument("--only", help="comma separated benchmarks to run: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown counted as a regression, 0.25 is 25%%")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}, choose from {', '.join(BENCHMARKS)}")
+
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results.update(BENCHMARKS[name]())
+        print(f"ran {name} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    pygame.quit()
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.platform(),
+        "results": results
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    try:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+    except FileNotFoundError:
+        baseline = {}
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        # Results that weren't run this time are kept from the old baseline
+        with open(args.baseline, "w") as file:
+            json.dump(dict(report, results=dict(baseline, **results)), file, indent=2)
+        print(f"saved the baseline to {args.baseline}")
+    elif regressions:
+        raise SystemExit(f"{len(regressions)} regressions of more than {args.threshold:.0%}: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Description: Policies that play SnakeEngine games without a player, used by bots and benchmarks
+# Imports
+import random
+
+from autopilot import autopilot_policy
+from snake_engine import DIRECTIONS, OPPOSITES
+
+# Function to get the direction from one cell to a neighbouring cell
+def direction_to(from_pos, to_pos):
+    if to_pos[0] != from_pos[0]:
+        return 'RIGHT' if to_pos[0] > from_pos[0] else 'LEFT'
+    return 'DOWN' if to_pos[1] > from_pos[1] else 'UP'
+
+# Function to check if moving in a direction kills the snake on the next tick
+def is_safe(engine, direction):
+    head_x, head_y = engine.head()
+    dx, dy = DIRECTIONS[direction]
+    x, y = head_x + dx, head_y + dy
+    if engine.is_wall(x, y):
+        return False
+    # The tail moves out of the way unless the snake is about to eat
+    if engine.is_occupied(x, y):
+        return engine.position(engine.body[-1]) == (x, y) and (x, y) not in engine.fruits
+    return True
+
+# Function to build a cycle that visits every cell of the play area once, it needs an even number of columns
+# It runs right along the first row and then snakes down and up the columns back to the start, so the snake
+# SnakeEngine starts with already lies on it
+def cycle_positions(engine):
+    positions = [(x, engine.top_row) for x in range(engine.cols)]
+    rows = range(engine.top_row + 1, engine.rows)
+    for i, x in enumerate(range(engine.cols - 1, -1, -1)):
+        positions += [(x, y) for y in (rows if i % 2 == 0 else reversed(rows))]
+    return positions
+
+# Random policy, turns at random into any direction that doesn't kill it straight away
+def random_policy(engine, seed=None):
+    rng = random.Random(seed)
+
+    def policy(engine):
+        options = [direction for direction in DIRECTIONS if direction != OPPOSITES[engine.direction] and is_safe(engine, direction)]
+        return rng.choice(options) if options else None
+
+    return policy
+
+# Greedy policy, heads for the closest fruit while avoiding moves that kill it straight away
+def greedy_policy(engine, seed=None):
+    def policy(engine):
+        head_x, head_y = engine.head()
+        best, best_distance = None, None
+        for direction, (dx, dy) in DIRECTIONS.items():
+            if direction == OPPOSITES[engine.direction] or not is_safe(engine, direction):
+                continue
+            x, y = head_x + dx, head_y + dy
+            distance = min((abs(x - fruit_x) + abs(y - fruit_y) for fruit_x, fruit_y in engine.fruits), default=0)
+            if best is None or distance < best_distance:
+                best, best_distance = direction, distance
+        return best
+
+    return policy
+
+# Scripted policy, follows a cycle through every cell so the snake never dies and eventually fills the board
+def cycle_policy(engine, seed=None):
+    positions = cycle_positions(engine)
+    following = {positions[i - 1]: positions[i] for i in range(len(positions))}
+
+    def policy(engine):
+        head = engine.head()
+        return direction_to(head, following[head])
+
+    return policy
+
+# Policies by name, each one is created with (engine, seed) and then called with the engine every tick
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "scripted": cycle_policy,
+    "autopilot": autopilot_policy
+}
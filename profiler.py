@@ -0,0 +1,147 @@
+# Description: Times the phases of every frame of the game into ring buffers, shows percentiles and exports them
+# Imports
+import csv
+import json
+import time
+from array import array
+
+from text_cache import TEXT_CACHE
+
+# Phases of a frame, in the order they happen
+INPUT, MOVE, FRUIT, COLLISION, FILL, SEGMENTS, TOP_BAR, UPDATE = range(8)
+PHASE_NAMES = ["input", "move", "fruit", "collision", "fill", "segments", "top_bar", "update"]
+
+FRAMES = 2048 # Frames kept in the ring buffers, about half a minute at 60 frames per second
+OVERLAY_REFRESH = 30 # Frames between updates of the numbers on the overlay
+OVERLAY_POSITION = (550, 60)
+
+# Function to get percentiles of a list of numbers, each p is between 0 and 100
+def percentiles(values, ps):
+    values = sorted(values)
+    if not values:
+        return [0.0 for p in ps]
+    return [values[round(p / 100 * (len(values) - 1))] for p in ps]
+
+# Frame profiler class
+# The engine and the renderers call lap(phase) after each part of the frame when their profiler attribute is set,
+# the time since the previous lap is added to that phase
+class FrameProfiler:
+    def __init__(self, frames=FRAMES, export_path=None):
+        self.frames = frames
+        self.phase_times = [array('d', bytes(8 * frames)) for name in PHASE_NAMES] # Seconds per phase of each frame
+        self.frame_times = array('d', bytes(8 * frames)) # Seconds of work in each frame, not counting waiting for the next one
+        self.ticks = array('q', bytes(8 * frames)) # Tick of the game at the end of each frame
+        self.lengths = array('q', bytes(8 * frames)) # Length of the snake at the end of each frame
+        self.speeds = array('q', bytes(8 * frames)) # Speed of the snake at the end of each frame
+        self.text_hits = array('q', bytes(8 * frames)) # Text surfaces TEXT_CACHE had already rendered in each frame
+        self.text_misses = array('q', bytes(8 * frames)) # Text surfaces it had to render in each frame
+        self.text_counts = (TEXT_CACHE.hits, TEXT_CACHE.misses) # The cache's hits and misses at the end of the last frame
+        self.text_cached = 0 # Surfaces in the cache at the end of the last frame
+        self.count = 0 # Frames recorded so far, the ring buffers hold the last `frames` of them
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.frame_start = self.last = time.perf_counter()
+
+        self.overlay = None # Surface with the latest percentiles, drawn again every OVERLAY_REFRESH frames
+        self.font = None
+
+        # Every frame is also written to the export file as it is recorded, one row per frame
+        self.export_path = export_path
+        self.export_file = self.csv_writer = None
+        if export_path:
+            self.export_file = open(export_path, "w", newline="")
+            if export_path.endswith(".csv"):
+                self.csv_writer = csv.writer(self.export_file)
+                self.csv_writer.writerow(["frame", "ticks", "length", "snake_speed", "frame_ms"] + [f"{name}_ms" for name in PHASE_NAMES] +
+                                         ["text_hits", "text_misses"])
+
+    # Function to start timing a frame
+    def start_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        self.current = [0.0] * len(PHASE_NAMES)
+
+    # Function to add the time since the last lap to a phase
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    # Function to store the timings of the frame that just finished
+    def end_frame(self, engine):
+        frame_time = time.perf_counter() - self.frame_start
+        index = self.count % self.frames
+        for phase, elapsed in enumerate(self.current):
+            self.phase_times[phase][index] = elapsed
+        self.frame_times[index] = frame_time
+        self.ticks[index] = engine.ticks
+        self.lengths[index] = len(engine.body)
+        self.speeds[index] = engine.snake_speed
+        self.count += 1
+
+        # The text cache counts from when it was last cleared, so a counter that went down started again from 0
+        text = TEXT_CACHE.stats()
+        hits, misses = self.text_counts
+        if text["hits"] < hits or text["misses"] < misses:
+            hits = misses = 0
+        text_hits, text_misses = text["hits"] - hits, text["misses"] - misses
+        self.text_hits[index] = text_hits
+        self.text_misses[index] = text_misses
+        self.text_counts = (text["hits"], text["misses"])
+        self.text_cached = text["size"]
+
+        if self.export_file:
+            times = [round(elapsed * 1000, 4) for elapsed in self.current]
+            if self.csv_writer:
+                self.csv_writer.writerow([self.count, engine.ticks, len(engine.body), engine.snake_speed, round(frame_time * 1000, 4)] + times +
+                                         [text_hits, text_misses])
+            else:
+                row = {"frame": self.count, "ticks": engine.ticks, "length": len(engine.body), "snake_speed": engine.snake_speed,
+                       "frame_ms": round(frame_time * 1000, 4)}
+                row.update(zip((f"{name}_ms" for name in PHASE_NAMES), times))
+                row.update(text_hits=text_hits, text_misses=text_misses)
+                self.export_file.write(json.dumps(row) + "\n")
+
+        if self.count % OVERLAY_REFRESH == 0:
+            self.overlay = None
+
+    # Function to get p50, p95 and p99 in milliseconds of every phase and the whole frame over the frames in the buffers
+    def summary(self):
+        recorded = min(self.count, self.frames)
+        summary = {}
+        for name, times in zip(PHASE_NAMES + ["frame"], self.phase_times + [self.frame_times]):
+            p50, p95, p99 = percentiles(times[:recorded], (50, 95, 99))
+            summary[name] = {"p50": p50 * 1000, "p95": p95 * 1000, "p99": p99 * 1000}
+        return summary
+
+    # Function to draw the percentiles over the board, returns the rectangle it covered
+    def draw_overlay(self, win):
+        import pygame
+
+        if self.overlay is None:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 18) # Pygame's own font, no need to search the system fonts
+            rows = [["ms", "p50", "p95", "p99"]]
+            rows += [[name] + [f"{row[p]:.3f}" for p in ("p50", "p95", "p99")] for name, row in self.summary().items()]
+            last = (self.count - 1) % self.frames
+            line_height = self.font.get_linesize()
+            self.overlay = pygame.Surface((240, line_height * (len(rows) + 2) + 10))
+            self.overlay.fill((0, 0, 0))
+            # Each column is drawn on its own so the numbers line up without a monospaced font
+            for i, row in enumerate(rows):
+                for j, column in enumerate(row):
+                    self.overlay.blit(self.font.render(column, 1, "white"), (5 + j * 55 + (15 if j else 0), 5 + i * line_height))
+            self.overlay.blit(self.font.render(f"length {self.lengths[last]}   speed {self.speeds[last]}", 1, "white"),
+                              (5, 5 + len(rows) * line_height))
+
+            # Text cache hits and misses over the frames in the buffers, and the surfaces it holds now
+            recorded = min(self.count, self.frames)
+            hits, misses = sum(self.text_hits[:recorded]), sum(self.text_misses[:recorded])
+            hit_rate = hits / (hits + misses) * 100 if hits + misses else 0.0
+            self.overlay.blit(self.font.render(f"text {hit_rate:.1f}% hits  {misses} misses  {self.text_cached} kept", 1, "white"),
+                              (5, 5 + (len(rows) + 1) * line_height))
+        return win.blit(self.overlay, OVERLAY_POSITION)
+
+    # Function to finish the export file
+    def close(self):
+        if self.export_file:
+            self.export_file.close()
+            self.export_file = None
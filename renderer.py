@@ -0,0 +1,367 @@
+# Description: Renderers that draw the board of a SnakeEngine onto the window
+# Imports
+from collections import OrderedDict
+
+import pygame
+
+from profiler import FILL, SEGMENTS, TOP_BAR, UPDATE
+from snake_engine import DIRECTIONS, OPPOSITES
+
+FRUIT_COLOR = (255, 0, 0)
+EYE_COLOR = (0, 0, 0)
+OUTSIDE_COLOR = (120, 120, 120) # Past the edge of a board that is smaller than the window
+
+# Chunks of boards bigger than the window
+CHUNK_CELLS = 32 # Width and height of a chunk in cells
+MAX_CHUNKS = 48 # Chunk surfaces kept at once, about 20 MB with 10 pixel cells, enough for the window and its surroundings
+FRUIT_MARKER_RADIUS = 5 # Size of the dots at the edge of the window that point at fruits out of view
+
+# Eyes on the head of the snake
+EYE_RADIUS = 2
+EYE_OFFSET_X = 3
+EYE_OFFSET_Y = 3
+
+# Full renderer class, clears and redraws the whole window every frame
+class FullRenderer:
+    def __init__(self, win, grid_size, bg_color, snake_color, top_bar_height, draw_top_bar):
+        self.win = win
+        self.grid_size = grid_size
+        self.bg_color = bg_color
+        self.snake_color = snake_color
+        self.top_bar_rect = pygame.Rect(0, 0, win.get_width(), top_bar_height)
+        self.draw_top_bar = draw_top_bar # Function called with (win, elapsed_time, score)
+        self.overlay = None # Function called with (win) after the top bar, returns the rectangle it drew over
+        self.profiler = None # FrameProfiler the drawing is timed with, see profiler.py
+        self.reset()
+
+    # Function to get the pixel rectangle of a cell
+    def cell_rect(self, x, y):
+        return pygame.Rect(x * self.grid_size, y * self.grid_size, self.grid_size, self.grid_size)
+
+    # Function to get the part of a cell along one of its sides, fraction is between 0 and 1
+    def partial_cell_rect(self, x, y, side, fraction):
+        rect = self.cell_rect(x, y)
+        size = round(self.grid_size * fraction)
+        if side == 'LEFT':
+            rect.width = size
+        elif side == 'RIGHT':
+            rect.left = rect.right - size
+            rect.width = size
+        elif side == 'UP':
+            rect.height = size
+        else:
+            rect.top = rect.bottom - size
+            rect.height = size
+        return rect
+
+    # Function to draw the head of the snake with its eyes
+    def draw_head(self, x, y, rect=None):
+        rect = rect or self.cell_rect(x, y)
+        pygame.draw.rect(self.win, self.snake_color, rect)
+        pygame.draw.circle(self.win, EYE_COLOR, (rect.x + EYE_OFFSET_X, rect.y + EYE_OFFSET_Y), EYE_RADIUS) # Left eye
+        pygame.draw.circle(self.win, EYE_COLOR, (rect.right - EYE_OFFSET_X, rect.y + EYE_OFFSET_Y), EYE_RADIUS) # Right eye
+        return rect
+
+    # Function to get the (head, cell the tail left) of each tick since the last frame, for renderers that keep the
+    # tick they drew last in self.ticks. Without the changes from the caller the engine only knows the last tick
+    def tick_changes(self, engine, changes):
+        if changes is None:
+            changes = [(engine.head(), engine.last_tail)][:engine.ticks - self.ticks]
+        return changes
+
+    # Function to draw what is left of the tail sliding out of the cell it left towards the next segment, progress is
+    # how far (0 to 1) the game is towards its next tick. Returns the cell's rectangle, None if nothing was drawn
+    def draw_tail_slice(self, engine, progress):
+        if progress is None or engine.last_tail is None:
+            return None
+        tail_x, tail_y = engine.position(engine.body[-1])
+        last_x, last_y = engine.last_tail
+        if tail_x != last_x:
+            side = 'RIGHT' if tail_x > last_x else 'LEFT'
+        else:
+            side = 'DOWN' if tail_y > last_y else 'UP'
+        rect = self.cell_rect(last_x, last_y)
+        self.win.fill(self.bg_color, rect)
+        pygame.draw.rect(self.win, self.snake_color, self.partial_cell_rect(last_x, last_y, side, 1 - progress))
+        return rect
+
+    # Function to start drawing a new game
+    def reset(self):
+        pass
+
+    # Function to draw a frame of the game, the full renderer doesn't interpolate so progress is ignored
+    # changes is the (head, cell the tail left) of each tick since the last frame, the full renderer doesn't need them
+    def draw(self, engine, elapsed_time, progress=None, changes=None):
+        profiler = self.profiler
+        board_rect = pygame.Rect(0, 0, engine.cols * self.grid_size, engine.rows * self.grid_size)
+        if board_rect.contains(self.win.get_rect()):
+            self.win.fill(self.bg_color)
+        else:
+            # Past the edge of a board smaller than the window is shown as outside, like the chunk renderer does
+            self.win.fill(OUTSIDE_COLOR)
+            self.win.fill(self.bg_color, board_rect)
+        if profiler is not None:
+            profiler.lap(FILL)
+
+        for x, y in engine.body_positions():
+            pygame.draw.rect(self.win, self.snake_color, self.cell_rect(x, y))
+        self.draw_head(*engine.head())
+
+        for x, y in engine.fruits:
+            pygame.draw.rect(self.win, FRUIT_COLOR, self.cell_rect(x, y))
+        if profiler is not None:
+            profiler.lap(SEGMENTS)
+
+        self.draw_top_bar(self.win, elapsed_time, engine.score)
+        if self.overlay:
+            self.overlay(self.win)
+        if profiler is not None:
+            profiler.lap(TOP_BAR)
+
+        pygame.display.update()
+        if profiler is not None:
+            profiler.lap(UPDATE)
+
+# Dirty rectangle renderer class, only redraws and updates the cells that changed since the last frame
+class DirtyRenderer(FullRenderer):
+    def reset(self):
+        self.head = None # The head drawn on the last frame
+        self.tail = None # The cell the tail was leaving on the last frame
+        self.ticks = 0 # The tick of the game drawn on the last frame
+        self.fruits = set() # The fruits drawn on the last frame
+
+    # Function to draw a frame of the game, the cost doesn't depend on the length of the snake
+    # progress is how far (0 to 1) the game is towards its next tick, None draws whole cells
+    # changes is the (head, cell the tail left) of each tick since the last frame, without them only one tick can be drawn
+    def draw(self, engine, elapsed_time, progress=None, changes=None):
+        changes = self.tick_changes(engine, changes)
+
+        # The first frame of a game has nothing to build on, and without every tick the cells in between are unknown
+        if self.head is None or len(changes) != engine.ticks - self.ticks:
+            super().draw(engine, elapsed_time)
+            self.head = engine.head()
+            self.tail = None
+            self.ticks = engine.ticks
+            self.fruits = set(engine.fruits)
+            return
+
+        profiler = self.profiler
+        dirty = []
+        moved = engine.ticks != self.ticks
+        self.ticks = engine.ticks
+
+        # What was left of the previous tail is gone once the snake moves on
+        if moved and self.tail is not None and self.tail != engine.last_tail:
+            rect = self.cell_rect(*self.tail)
+            self.win.fill(self.bg_color, rect)
+            dirty.append(rect)
+        self.tail = engine.last_tail
+
+        # Each tick the tail moves out of its cell and the old head becomes a plain body segment, in the order they
+        # happened so a cell left and entered again in the same frame ends up right
+        for head, tail in changes:
+            if tail is not None:
+                rect = self.cell_rect(*tail)
+                self.win.fill(self.bg_color, rect)
+                dirty.append(rect)
+            if self.head != tail:
+                rect = self.cell_rect(*self.head)
+                pygame.draw.rect(self.win, self.snake_color, rect)
+                dirty.append(rect)
+            self.head = head
+
+        # What is left of the tail slides towards the next segment
+        rect = self.draw_tail_slice(engine, progress)
+        if rect is not None:
+            dirty.append(rect)
+        if profiler is not None:
+            profiler.lap(FILL)
+
+        # The new head is drawn last, over whatever it ate
+        if progress is None:
+            dirty.append(self.draw_head(*self.head))
+        else:
+            # The head grows into its cell from the side it came from
+            rect = self.cell_rect(*self.head)
+            self.win.fill(self.bg_color, rect)
+            partial = self.partial_cell_rect(*self.head, OPPOSITES[engine.direction], progress)
+            self.win.set_clip(rect) # Keep the eyes inside the cell while the head is thinner than them
+            self.draw_head(*self.head, partial)
+            self.win.set_clip(None)
+            dirty.append(rect)
+
+        # Eaten fruits are covered by the head, so only new ones need drawing
+        fruits = set(engine.fruits)
+        for x, y in fruits - self.fruits:
+            rect = self.cell_rect(x, y)
+            pygame.draw.rect(self.win, FRUIT_COLOR, rect)
+            dirty.append(rect)
+        self.fruits = fruits
+        if profiler is not None:
+            profiler.lap(SEGMENTS)
+
+        self.draw_top_bar(self.win, elapsed_time, engine.score)
+        dirty.append(self.top_bar_rect)
+        if self.overlay:
+            dirty.append(self.overlay(self.win)) # Drawn every frame so the snake never shows through it
+        if profiler is not None:
+            profiler.lap(TOP_BAR)
+
+        pygame.display.update(dirty)
+        if profiler is not None:
+            profiler.lap(UPDATE)
+
+# Camera class, the part of a board bigger than the window that is shown, in pixels
+class Camera:
+    def __init__(self, view_width, view_height, board_width, board_height, top_bar_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.top_bar_height = top_bar_height # The top bar covers the top of the view
+        self.x = 0
+        self.y = 0
+
+    # Function to center the part of the view below the top bar on a point of the board, without going past its edges
+    def follow(self, x, y):
+        self.x = max(0, min(round(x) - self.view_width // 2, self.board_width - self.view_width))
+        centre_y = self.top_bar_height + (self.view_height - self.top_bar_height) // 2
+        self.y = max(0, min(round(y) - centre_y, self.board_height - self.view_height))
+
+# Chunk renderer class, draws boards of any size by following the head with a camera
+# The board is cut into chunks of CHUNK_CELLS x CHUNK_CELLS cells that are drawn once onto their own surface and then
+# only touched up where cells change, so a frame is a few blits whatever the size of the board or length of the snake
+# Only the chunks near the camera are kept, the one used longest ago is dropped when there are more than MAX_CHUNKS
+class ChunkRenderer(FullRenderer):
+    def reset(self):
+        self.chunks = OrderedDict() # Chunk surfaces by (chunk x, chunk y), the most recently used last
+        self.camera = None
+        self.head = None # The head drawn on the last frame
+        self.ticks = 0 # The tick of the game drawn on the last frame
+        self.fruits = set() # The fruits drawn on the last frame
+
+    # Function to get the pixel rectangle of a cell on the window
+    def cell_rect(self, x, y):
+        return pygame.Rect(x * self.grid_size - self.camera.x, y * self.grid_size - self.camera.y, self.grid_size, self.grid_size)
+
+    # Function to draw a whole chunk from the engine, the head isn't part of it because it is drawn every frame
+    def build_chunk(self, engine, chunk_x, chunk_y):
+        size = CHUNK_CELLS * self.grid_size
+        surface = pygame.Surface((size, size), 0, self.win)
+        surface.fill(OUTSIDE_COLOR)
+        first_x, first_y = chunk_x * CHUNK_CELLS, chunk_y * CHUNK_CELLS
+        last_x, last_y = min(first_x + CHUNK_CELLS, engine.cols), min(first_y + CHUNK_CELLS, engine.rows)
+        surface.fill(self.bg_color, (0, 0, (last_x - first_x) * self.grid_size, (last_y - first_y) * self.grid_size))
+
+        # Jump from one snake cell to the next along each row instead of looking at every cell
+        grid, cols = engine.grid, engine.cols
+        head = engine.body[0]
+        for y in range(first_y, last_y):
+            row = y * cols
+            cell = grid.find(1, row + first_x, row + last_x)
+            while cell != -1:
+                if cell != head:
+                    surface.fill(self.snake_color, ((cell - row - first_x) * self.grid_size, (y - first_y) * self.grid_size, self.grid_size, self.grid_size))
+                cell = grid.find(1, cell + 1, row + last_x)
+        for x, y in engine.fruits:
+            if first_x <= x < last_x and first_y <= y < last_y:
+                surface.fill(FRUIT_COLOR, ((x - first_x) * self.grid_size, (y - first_y) * self.grid_size, self.grid_size, self.grid_size))
+        return surface
+
+    # Function to get the surface of a chunk, drawing it if it isn't kept
+    def chunk(self, engine, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self.chunks[key] = self.build_chunk(engine, chunk_x, chunk_y)
+            if len(self.chunks) > MAX_CHUNKS:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return surface
+
+    # Function to change the color of a cell in its chunk, chunks that aren't kept are drawn from the engine when needed
+    def paint_cell(self, x, y, color):
+        surface = self.chunks.get((x // CHUNK_CELLS, y // CHUNK_CELLS))
+        if surface is not None:
+            surface.fill(color, (x % CHUNK_CELLS * self.grid_size, y % CHUNK_CELLS * self.grid_size, self.grid_size, self.grid_size))
+
+    # Function to draw a frame of the game, progress is how far (0 to 1) the game is towards its next tick
+    # changes is the (head, cell the tail left) of each tick since the last frame, like for DirtyRenderer.draw()
+    def draw(self, engine, elapsed_time, progress=None, changes=None):
+        profiler = self.profiler
+        grid_size = self.grid_size
+        if self.camera is None:
+            self.camera = Camera(self.win.get_width(), self.win.get_height(), engine.cols * grid_size, engine.rows * grid_size,
+                                 self.top_bar_rect.height)
+        changes = self.tick_changes(engine, changes)
+
+        # Bring the kept chunks up to date one tick at a time, without every tick the cells in between are unknown so
+        # they are drawn again
+        if self.head is None or len(changes) != engine.ticks - self.ticks:
+            self.chunks.clear()
+        elif changes:
+            for head, tail in changes:
+                if tail is not None:
+                    self.paint_cell(*tail, self.bg_color)
+                if self.head != tail:
+                    self.paint_cell(*self.head, self.snake_color) # The old head becomes a plain body segment
+                self.head = head
+            self.paint_cell(*self.head, self.bg_color) # The head is drawn every frame, over whatever it ate
+            fruits = set(engine.fruits)
+            for x, y in fruits - self.fruits:
+                self.paint_cell(x, y, FRUIT_COLOR)
+        self.head = engine.head()
+        self.ticks = engine.ticks
+        self.fruits = set(engine.fruits)
+
+        # Keep the head, part of the way into its next cell, in the middle of the view
+        head_x, head_y = self.head
+        dx, dy = DIRECTIONS[engine.direction]
+        behind = 0 if progress is None else 1 - progress
+        self.camera.follow((head_x + 0.5 - dx * behind) * grid_size, (head_y + 0.5 - dy * behind) * grid_size)
+
+        # Blit the chunks the view overlaps
+        camera = self.camera
+        chunk_size = CHUNK_CELLS * grid_size
+        for chunk_y in range(camera.y // chunk_size, (camera.y + camera.view_height - 1) // chunk_size + 1):
+            for chunk_x in range(camera.x // chunk_size, (camera.x + camera.view_width - 1) // chunk_size + 1):
+                self.win.blit(self.chunk(engine, chunk_x, chunk_y), (chunk_x * chunk_size - camera.x, chunk_y * chunk_size - camera.y))
+        if profiler is not None:
+            profiler.lap(FILL)
+
+        # What is left of the tail slides towards the next segment
+        self.draw_tail_slice(engine, progress)
+
+        # The head grows into its cell from the side it came from
+        rect = self.cell_rect(*self.head)
+        if progress is None:
+            self.draw_head(*self.head)
+        else:
+            self.win.set_clip(rect) # Keep the eyes inside the cell while the head is thinner than them
+            self.draw_head(*self.head, self.partial_cell_rect(*self.head, OPPOSITES[engine.direction], progress))
+            self.win.set_clip(None)
+
+        # Fruits out of view are shown as dots at the edge of the view, in their direction
+        view = self.win.get_rect()
+        view.top = self.top_bar_rect.bottom
+        view.height -= self.top_bar_rect.height
+        for x, y in engine.fruits:
+            fruit_rect = self.cell_rect(x, y)
+            if not view.colliderect(fruit_rect):
+                marker_x = min(max(fruit_rect.centerx, view.left + FRUIT_MARKER_RADIUS), view.right - FRUIT_MARKER_RADIUS)
+                marker_y = min(max(fruit_rect.centery, view.top + FRUIT_MARKER_RADIUS), view.bottom - FRUIT_MARKER_RADIUS)
+                pygame.draw.circle(self.win, FRUIT_COLOR, (marker_x, marker_y), FRUIT_MARKER_RADIUS)
+        if profiler is not None:
+            profiler.lap(SEGMENTS)
+
+        self.draw_top_bar(self.win, elapsed_time, engine.score)
+        if self.overlay:
+            self.overlay(self.win)
+        if profiler is not None:
+            profiler.lap(TOP_BAR)
+
+        # The camera moves with the head, so the whole window changes
+        pygame.display.update()
+        if profiler is not None:
+            profiler.lap(UPDATE)
@@ -0,0 +1,231 @@
+# Description: Compact replays of snake games, recorded while playing and re-simulated with SnakeEngine
+# Usage: python replay.py info FILE
+#        python replay.py watch FILE
+#        python replay.py validate FILE [FILE ...] [--workers N]
+# Imports
+import os
+import struct
+import time
+
+from snake_engine import DIRECTIONS, SnakeEngine
+
+# File layout:
+#   header: magic, version, seed, board columns, rows and first row, starting direction and length
+#   moves:  one byte per run of ticks in the same direction, direction in the top 2 bits and the run length (1-63)
+#           in the low 6 bits, a 0 byte ends the moves
+#   footer: final score and number of ticks
+MAGIC = b"SNKR"
+VERSION = 1
+HEADER = struct.Struct("<4sBQHHHBH")
+FOOTER = struct.Struct("<II")
+MAX_RUN = 63
+END = 0
+
+DIRECTION_CODES = list(DIRECTIONS) # 2 bit code of each direction
+KEYFRAME_INTERVAL = 500 # Ticks between snapshots when seeking through a replay
+MAX_WATCH_SIZE = (800, 600) # Biggest window a replay is watched in, bigger boards scroll
+
+# Replay writer class, streams the moves of a game to a file as they are played
+class ReplayWriter:
+    def __init__(self, path, engine):
+        self.file = open(path, "wb")
+        head_code = DIRECTION_CODES.index(engine.direction)
+        self.file.write(HEADER.pack(MAGIC, VERSION, engine.seed, engine.cols, engine.rows, engine.top_row,
+                                    head_code, len(engine.body)))
+        self.code = None # Direction of the current run
+        self.run = 0 # Ticks in the current run
+
+    # Function to record the direction the snake moved in on a tick
+    def record(self, direction):
+        code = DIRECTION_CODES.index(direction)
+        if code != self.code or self.run == MAX_RUN:
+            self.flush_run()
+            self.code = code
+        self.run += 1
+
+    # Function to write out the current run
+    def flush_run(self):
+        if self.run:
+            self.file.write(bytes([self.code << 6 | self.run]))
+            self.run = 0
+
+    # Function to finish the replay with the result of the game
+    def close(self, score, ticks):
+        if self.file.closed:
+            return
+        self.flush_run()
+        self.file.write(bytes([END]))
+        self.file.write(FOOTER.pack(score, ticks))
+        self.file.close()
+
+# Replay class, a recorded game read back from a file
+class Replay:
+    def __init__(self, seed, cols, rows, top_row, direction, length, moves, score=None, ticks=None):
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        self.top_row = top_row
+        self.direction = direction
+        self.length = length
+        self.moves = moves # Direction code of every tick
+        self.score = score # Claimed final score, None if the recording was cut off
+        self.ticks = ticks
+
+    # Function to create an engine on the replay's board at the start of the game
+    def new_engine(self):
+        engine = SnakeEngine(self.cols, self.rows, 1, self.top_row)
+        engine.reset(self.seed)
+        if engine.direction != self.direction or len(engine.body) != self.length:
+            raise ValueError("The replay doesn't start like a new game")
+        return engine
+
+# Function to read a replay file
+def read_replay(path):
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, seed, cols, rows, top_row, code, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} snake replay")
+
+    moves = bytearray()
+    position = HEADER.size
+    while position < len(data) and data[position] != END:
+        moves += bytes([data[position] >> 6]) * (data[position] & MAX_RUN)
+        position += 1
+
+    # A missing footer means the game wasn't finished, for example if the game crashed
+    score = ticks = None
+    if position + 1 + FOOTER.size <= len(data):
+        score, ticks = FOOTER.unpack_from(data, position + 1)
+    return Replay(seed, cols, rows, top_row, DIRECTION_CODES[code], length, moves, score, ticks)
+
+# Replay player class, re-simulates a replay and can seek to any tick
+# Snapshots taken every KEYFRAME_INTERVAL ticks mean a seek only ever simulates up to that many ticks
+class ReplayPlayer:
+    def __init__(self, replay, keyframe_interval=KEYFRAME_INTERVAL):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.engine = replay.new_engine()
+        self.keyframes = [self.engine.snapshot()] # Snapshot at every multiple of keyframe_interval simulated so far
+
+    # Function to advance the replay by one tick, returns False at the end of the replay
+    def step(self):
+        engine = self.engine
+        if engine.done or engine.ticks >= len(self.replay.moves):
+            return False
+        engine.move(DIRECTION_CODES[self.replay.moves[engine.ticks]])
+        if engine.ticks % self.keyframe_interval == 0 and engine.ticks // self.keyframe_interval == len(self.keyframes):
+            self.keyframes.append(engine.snapshot())
+        return True
+
+    # Function to jump to a tick of the replay
+    def seek(self, tick):
+        tick = max(0, min(tick, len(self.replay.moves)))
+        keyframe = min(tick // self.keyframe_interval, len(self.keyframes) - 1)
+        # Only go back to a keyframe if it is closer than where the engine already is
+        if not keyframe * self.keyframe_interval <= self.engine.ticks <= tick:
+            self.engine.restore(self.keyframes[keyframe])
+        while self.engine.ticks < tick and self.step():
+            pass
+
+# Function to check that a replay really plays out to the score it claims, returns (valid, reason)
+def validate(path):
+    try:
+        replay = read_replay(path)
+        if replay.score is None:
+            return False, "unfinished"
+        engine = replay.new_engine()
+    except (OSError, ValueError, struct.error) as error:
+        return False, str(error)
+
+    # Nothing to seek, so the moves are played straight through without a ReplayPlayer
+    move = engine.move
+    for code in replay.moves:
+        move(DIRECTION_CODES[code])
+        if engine.done:
+            break
+
+    if engine.ticks != len(replay.moves):
+        return False, f"the snake died on tick {engine.ticks} of {len(replay.moves)}"
+    if engine.score != replay.score or engine.ticks != replay.ticks:
+        return False, f"claimed score {replay.score} in {replay.ticks} ticks, replayed {engine.score} in {engine.ticks}"
+    return True, f"score {engine.score}"
+
+# Function to watch a replay in a window, left and right arrows seek and space pauses
+def watch(path):
+    import pygame
+    from renderer import ChunkRenderer, DirtyRenderer
+
+    replay = read_replay(path)
+    player = ReplayPlayer(replay)
+    grid_size = 10
+    pygame.init()
+    board_size = (replay.cols * grid_size, replay.rows * grid_size)
+    win = pygame.display.set_mode((min(board_size[0], MAX_WATCH_SIZE[0]), min(board_size[1], MAX_WATCH_SIZE[1])))
+    pygame.display.set_caption("Snake Game Replay")
+    font = pygame.font.Font(None, 30)
+    top_bar_height = replay.top_row * grid_size
+
+    # Draw the tick and score where the game draws its top bar
+    def draw_top_bar(win, elapsed_time, score):
+        pygame.draw.rect(win, "#13780A", (0, 0, win.get_width(), top_bar_height))
+        win.blit(font.render(f"Tick: {player.engine.ticks}/{len(replay.moves)}   Score: {score}", 1, "white"), (10, 10))
+
+    renderer_class = DirtyRenderer if win.get_size() == board_size else ChunkRenderer
+    renderer = renderer_class(win, grid_size, (225, 225, 225), "#1DB30E", top_bar_height, draw_top_bar)
+    clock = pygame.time.Clock()
+    paused = False
+    while True:
+        clock.tick(player.engine.snake_speed)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    step = KEYFRAME_INTERVAL if event.key == pygame.K_RIGHT else -KEYFRAME_INTERVAL
+                    player.seek(player.engine.ticks + step)
+                    renderer.reset() # Anything could have changed, so draw the next frame in full
+        if not paused:
+            player.step()
+        renderer.draw(player.engine, 0)
+
+def main():
+    # Only the command line needs these, so the game doesn't pay for importing them
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = argparse.ArgumentParser(description="Inspect, watch and validate snake game replays.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="show what a replay contains")
+    info_parser.add_argument("path")
+    watch_parser = commands.add_parser("watch", help="play a replay back in a window")
+    watch_parser.add_argument("path")
+    validate_parser = commands.add_parser("validate", help="re-simulate replays and check their claimed scores")
+    validate_parser.add_argument("paths", nargs="+")
+    validate_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        replay = read_replay(args.path)
+        print(f"seed {replay.seed}, board {replay.cols}x{replay.rows}, {len(replay.moves)} ticks, "
+              f"claimed score {replay.score}, {os.path.getsize(args.path)} bytes")
+    elif args.command == "watch":
+        watch(args.path)
+    else:
+        start = time.perf_counter()
+        invalid = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for path, (valid, reason) in zip(args.paths, executor.map(validate, args.paths, chunksize=64)):
+                if not valid:
+                    invalid += 1
+                    print(f"INVALID {path}: {reason}")
+        elapsed = time.perf_counter() - start
+        print(f"{len(args.paths) - invalid}/{len(args.paths)} valid, {len(args.paths) / elapsed:,.0f} replays/s")
+        raise SystemExit(1 if invalid else 0)
+
+if __name__ == "__main__":
+    main()
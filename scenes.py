@@ -0,0 +1,15 @@
+# Description: Runs the screens of the game one after another without them calling each other
+# Screens
+HOME = "home"
+PLAYING = "playing"
+GAME_OVER = "game_over"
+CONFIRM_RESET = "confirm_reset"
+QUIT = "quit"
+
+# Function to run screens until one of them returns QUIT
+# Each screen returns the name of the next one instead of calling it, so however many games are played the
+# stack stays one screen deep and nothing from the previous screens is kept alive
+def run_scenes(scenes, first=HOME):
+    scene = first
+    while scene != QUIT:
+        scene = scenes[scene]()
@@ -0,0 +1,87 @@
+# Description: High score storage in SQLite, one row per player with an index on the score
+# Imports
+import json
+import os
+import sqlite3
+
+# Adds a player or raises their score, leaving it alone if the new score isn't better
+UPSERT = ("INSERT INTO scores (player, score) VALUES (?, ?) "
+          "ON CONFLICT (player) DO UPDATE SET score = excluded.score WHERE excluded.score > scores.score")
+
+# High score store class
+class HighScoreStore:
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        # Writers from other processes wait for the lock instead of failing straight away
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL") # Readers don't block the writer and a crash can't leave a half written file
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS scores (player TEXT PRIMARY KEY, score INTEGER NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)")
+
+        self.best = {} # Scores of players looked up or saved by this process
+        self.top_cache = {} # Results of top() by the number of entries asked for
+
+        if legacy_json_path:
+            self.import_json(legacy_json_path)
+
+    # Function to bring in the scores of the old high_scores.json file once, the file is renamed afterwards
+    def import_json(self, json_path):
+        try:
+            with open(json_path, "r") as file:
+                scores = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+        scores = {player: int(data[0]) if isinstance(data, list) else int(data) for player, data in scores.items()}
+        self.submit_many(scores.items())
+        os.replace(json_path, json_path + ".imported")
+
+    # Function to save a player's score, only kept if it beats their best, returns True if it did
+    def submit(self, player, score):
+        with self.connection:
+            cursor = self.connection.execute(UPSERT, (player, score))
+        if cursor.rowcount:
+            self.best[player] = score
+            self.top_cache.clear()
+            return True
+        self.best.pop(player, None) # Another process may have saved a better score
+        return False
+
+    # Function to save many scores in one transaction
+    def submit_many(self, scores):
+        with self.connection:
+            self.connection.executemany(UPSERT, scores)
+        self.best.clear()
+        self.top_cache.clear()
+
+    # Function to get a player's best score, None if they haven't played
+    def get(self, player):
+        if player not in self.best:
+            row = self.connection.execute("SELECT score FROM scores WHERE player = ?", (player,)).fetchone()
+            if row is None:
+                return None
+            self.best[player] = row[0]
+        return self.best[player]
+
+    # Function to get the best scores as (player, score) pairs, highest first
+    def top(self, count=5):
+        if count not in self.top_cache:
+            self.top_cache[count] = self.connection.execute(
+                "SELECT player, score FROM scores ORDER BY score DESC, player LIMIT ?", (count,)
+            ).fetchall()
+        return self.top_cache[count]
+
+    # Function to get the number of players with a high score
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    # Function to delete every high score
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM scores")
+        self.best.clear()
+        self.top_cache.clear()
+
+    def close(self):
+        self.connection.close()
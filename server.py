@@ -0,0 +1,244 @@
+# Description: Hosts many snake games at once over TCP, stepped together by one shared tick loop and streamed to the
+#              players as small binary deltas
+# Usage: python server.py [--host 127.0.0.1] [--port 5555] [--duration SECONDS] [--report SECONDS] [--warmup SECONDS]
+# Imports
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+
+from profiler import percentiles
+from replay import DIRECTION_CODES
+from snake_engine import SnakeEngine
+
+# Protocol:
+#   client to server: one byte per key press with the code of the direction (0-3), anything else is ignored
+#   server to client: START with the whole game once, then a record for every tick of the game. A record is a byte
+#                     with the direction the head moved in (bits 0-1), whether the snake grew (bit 2) or died (bit 3)
+#                     and how many fruits were spawned (bits 4-5), followed by the cell of each new fruit. The client
+#                     adds the head, drops the tail unless the snake grew and removes the fruit the head landed on.
+#                     The record the snake died on is followed by END with the score, the ticks, and the length and
+#                     checksum of the board as the engine left it, then the connection closes. The snake still moves
+#                     into itself on that tick, but not into a wall
+#   start:  magic, version, seed, board columns, rows and first row, direction, length of the snake, number of fruits,
+#           then the cells of the body (head first) and of the fruits
+#   cells are packed like in the engine (y * columns + x) into 4 bytes
+#   checksum: CRC-32 of the cells of the body (head first) followed by the cells of the fruits in ascending order
+MAGIC = b"SNKS"
+VERSION = 2
+START = struct.Struct("<4sBQHHHBII")
+END = struct.Struct("<IIII") # Score, ticks, length of the snake and checksum of the board
+CELL = struct.Struct("<I")
+GREW = 0x04
+DIED = 0x08
+FRUIT_SHIFT = 4
+
+PORT = 5555
+TICK_RATE = 60 # Passes over every session per second, like the frames of the game
+MAX_TICKS_PER_PASS = 5 # Most game ticks a session runs in one pass before it is allowed to fall behind, like main()
+MAX_BUFFER = 64 * 1024 # Bytes waiting to go to a client before it is dropped for being too slow
+STATS_PASSES = 6000 # Passes kept for the jitter and pass time statistics, 100 seconds at 60 passes per second
+
+# Function to pack the START message of a game
+def pack_start(engine):
+    fruits = [engine.cell(x, y) for x, y in engine.fruits]
+    header = START.pack(MAGIC, VERSION, engine.seed, engine.cols, engine.rows, engine.top_row,
+                        DIRECTION_CODES.index(engine.direction), len(engine.body), len(fruits))
+    return header + struct.pack(f"<{len(engine.body) + len(fruits)}I", *engine.body, *fruits)
+
+# Function to get the checksum of a board from the cells of the body and the fruits, both packed
+# Only worked out once per game, when it ends, so the client can check the board it rebuilt from the deltas
+def board_checksum(body, fruits):
+    fruits = sorted(fruits)
+    return zlib.crc32(struct.pack(f"<{len(body) + len(fruits)}I", *body, *fruits))
+
+# Session class, one game played by one client
+class Session(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.engine = SnakeEngine()
+        self.change_to = None # Latest direction the client asked for, used on the next tick like the arrow keys in main()
+        self.accumulator = 0.0 # Time that hasn't been simulated yet
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.engine.reset()
+        self.change_to = self.engine.direction
+        transport.write(pack_start(self.engine))
+        self.server.sessions.append(self)
+        self.server.opened += 1
+
+    # Function to take the direction changes the client sent, only the last one counts
+    def data_received(self, data):
+        for code in reversed(data):
+            if code < len(DIRECTION_CODES):
+                self.change_to = DIRECTION_CODES[code]
+                return
+
+    def connection_lost(self, exc):
+        self.transport = None # The next pass drops the session
+
+# Game server class
+# Every session is stepped in the same pass of tick(), so hundreds of games cost one wake up of the event loop per frame
+class GameServer:
+    def __init__(self, tick_rate=TICK_RATE):
+        self.tick_rate = tick_rate
+        self.sessions = []
+
+        # Statistics
+        self.opened = 0
+        self.finished = 0
+        self.dropped = 0 # Sessions closed because the client went away or couldn't keep up
+        self.moves = 0
+        self.bytes_sent = 0 # Bytes of the deltas, the START messages aren't counted
+        self.jitter = deque(maxlen=STATS_PASSES) # Seconds each pass started later than it should have
+        self.pass_times = deque(maxlen=STATS_PASSES) # Seconds each pass took
+        self.session_counts = deque(maxlen=STATS_PASSES) # Sessions in each pass
+        self.report_start = (time.perf_counter(), time.process_time())
+
+    # Function to advance every session by `elapsed` seconds in one pass and send each client what changed
+    def tick(self, elapsed):
+        ended = False
+        for session in self.sessions:
+            transport = session.transport
+            if transport is None or transport.get_write_buffer_size() > MAX_BUFFER:
+                if transport is not None:
+                    transport.abort()
+                    session.transport = None
+                self.dropped += 1
+                ended = True
+                continue
+
+            engine = session.engine
+            session.accumulator += elapsed
+            records = bytearray()
+            ticks = 0
+            while session.accumulator >= 1 / engine.snake_speed:
+                session.accumulator -= 1 / engine.snake_speed
+                fruits = len(engine.fruits)
+                points = engine.move(session.change_to)
+                ticks += 1
+                record = DIRECTION_CODES.index(engine.direction)
+                if points:
+                    new_fruits = engine.fruits[fruits - 1:] # The eaten fruit was removed before the new ones were added
+                    records.append(record | GREW | len(new_fruits) << FRUIT_SHIFT)
+                    for x, y in new_fruits:
+                        records += CELL.pack(engine.cell(x, y))
+                elif engine.done:
+                    records.append(record | DIED)
+                    fruit_cells = [engine.cell(x, y) for x, y in engine.fruits]
+                    records += END.pack(engine.score, engine.ticks, len(engine.body), board_checksum(engine.body, fruit_cells))
+                    break
+                else:
+                    records.append(record)
+                if ticks == MAX_TICKS_PER_PASS:
+                    session.accumulator = 0.0
+                    break
+
+            self.moves += ticks
+            if records:
+                transport.write(records)
+                self.bytes_sent += len(records)
+            if engine.done:
+                transport.close()
+                session.transport = None
+                self.finished += 1
+                ended = True
+
+        if ended:
+            self.sessions = [session for session in self.sessions if session.transport is not None]
+
+    # Function to run the shared tick loop, it keeps to the tick rate and measures how late each pass starts
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        last = next_pass = loop.time()
+        while True:
+            next_pass += interval
+            delay = next_pass - loop.time()
+            await asyncio.sleep(max(delay, 0))
+            now = loop.time()
+            self.jitter.append(now - next_pass)
+            if now - next_pass > MAX_TICKS_PER_PASS * interval:
+                next_pass = now # Too far behind to catch up, start again from now
+
+            start = time.perf_counter()
+            self.tick(now - last)
+            last = now
+            self.pass_times.append(time.perf_counter() - start)
+            self.session_counts.append(len(self.sessions))
+
+    # Function to get the statistics since the last report, times in milliseconds
+    def stats(self):
+        wall_start, cpu_start = self.report_start
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.report_start = (wall, cpu)
+        cores = (cpu - cpu_start) / (wall - wall_start) if wall > wall_start else 0.0
+        sessions = sum(self.session_counts) / len(self.session_counts) if self.session_counts else 0.0
+
+        jitter = percentiles(self.jitter, (50, 99))
+        pass_times = percentiles(self.pass_times, (50, 99))
+        stats = {
+            "sessions": len(self.sessions),
+            "mean_sessions": sessions,
+            "opened": self.opened,
+            "finished": self.finished,
+            "dropped": self.dropped,
+            "moves": self.moves,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_move": self.bytes_sent / self.moves if self.moves else 0.0,
+            "cores": cores, # CPU time over wall time, 1.0 is one core kept busy
+            "sessions_per_core": sessions / cores if cores else 0.0,
+            "jitter_ms": {"p50": jitter[0] * 1000, "p99": jitter[1] * 1000, "max": max(self.jitter, default=0.0) * 1000},
+            "pass_ms": {"p50": pass_times[0] * 1000, "p99": pass_times[1] * 1000, "max": max(self.pass_times, default=0.0) * 1000}
+        }
+        self.jitter.clear()
+        self.pass_times.clear()
+        self.session_counts.clear()
+        return stats
+
+    # Function to serve games until the duration is up, printing the statistics as JSON every `report` seconds
+    # The first statistics come after `warmup` seconds so clients that are still connecting can be left out
+    async def serve(self, host="127.0.0.1", port=PORT, duration=None, report=10.0, warmup=None):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: Session(self), host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"listening on {host}:{port}", flush=True) # The load generator reads the port from this line
+
+        ticks = asyncio.ensure_future(self.run_ticks())
+        end = None if duration is None else loop.time() + duration
+        next_report = loop.time() + (report if warmup is None else warmup)
+        try:
+            while end is None or loop.time() < end:
+                await asyncio.sleep(max(next_report if end is None else min(next_report, end), loop.time()) - loop.time())
+                print(json.dumps(self.stats()), flush=True)
+                next_report += report
+        finally:
+            ticks.cancel()
+            server.close()
+            for session in self.sessions:
+                if session.transport is not None:
+                    session.transport.close()
+            await server.wait_closed()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many snake games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="port to listen on, 0 picks a free one")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE, help="passes over every session per second")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--report", type=float, default=10.0, help="seconds between statistics lines")
+    parser.add_argument("--warmup", type=float, help="seconds before the first statistics line, the same as --report by default")
+    args = parser.parse_args()
+    try:
+        asyncio.run(GameServer(args.tick_rate).serve(args.host, args.port, args.duration, args.report, args.warmup))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
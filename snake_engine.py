@@ -0,0 +1,343 @@
+# Description: Headless snake game logic shared by the game, bots and tests
+# Imports
+import random
+from array import array
+from collections import deque, namedtuple
+
+from profiler import COLLISION, FRUIT, MOVE
+
+# Movement of each direction in grid cells
+DIRECTIONS = {
+    'UP': (0, -1),
+    'DOWN': (0, 1),
+    'LEFT': (-1, 0),
+    'RIGHT': (1, 0)
+}
+
+# The direction the snake is not allowed to turn into
+OPPOSITES = {
+    'UP': 'DOWN',
+    'DOWN': 'UP',
+    'LEFT': 'RIGHT',
+    'RIGHT': 'LEFT'
+}
+
+FRUIT_SCORE = 10 # Points for eating a fruit
+BONUS_FRUIT_EVERY = 50 # An extra fruit is spawned every time the score reaches a multiple of this
+START_SPEED = 15 # The starting speed of the snake in ticks per second
+HUGE_BOARD_CELLS = 1 << 18 # Boards with more cells than this (about 500x500) are stored with BitGrid and SparseFreeCells
+MAX_SPAWN_TRIES = 64 # Random cells tried on a huge board before searching it in order for a free one
+
+# Snapshot of the game returned by reset() and step(), positions are in grid cells
+SnakeState = namedtuple("SnakeState", ["head", "direction", "length", "score", "snake_speed", "fruits", "ticks"])
+
+# Free cells class, the empty cells of the board kept in a list that can be sampled and updated in O(1)
+class FreeCells:
+    def __init__(self, first, size):
+        self.cells = array('i', range(first, size)) # The free cells in no particular order
+        self.index = array('i', [-1]) * first + array('i', range(size - first)) # Position of each cell in cells, -1 if not free
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.index[cell] != -1
+
+    # Function to mark a cell as free
+    def add(self, cell):
+        if self.index[cell] == -1:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    # Function to mark a cell as taken, the last cell fills the gap so nothing has to shift
+    def remove(self, cell):
+        i = self.index[cell]
+        if i == -1:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[i] = last
+            self.index[last] = i
+        self.index[cell] = -1
+
+    # Function to make an independent copy of the free cells
+    def copy(self):
+        free = FreeCells.__new__(FreeCells)
+        free.cells = array('i', self.cells)
+        free.index = array('i', self.index)
+        return free
+
+    # Function to pick a random free cell, None if the board is full
+    def sample(self, rng):
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+# Bit grid class, one bit per cell instead of a byte, indexed like a bytearray
+class BitGrid:
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) >> 3)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, cell):
+        return self.bits[cell >> 3] >> (cell & 7) & 1
+
+    def __setitem__(self, cell, value):
+        if value:
+            self.bits[cell >> 3] |= 1 << (cell & 7)
+        else:
+            self.bits[cell >> 3] &= ~(1 << (cell & 7)) & 0xFF
+
+    # Function to find the first cell from start up to end that is set, -1 if there is none
+    # Works like bytearray.find(1, start, end) so code can search either kind of grid, only 1 can be searched for
+    def find(self, value, start, end):
+        cell = start
+        while cell < end:
+            byte = self.bits[cell >> 3] >> (cell & 7)
+            if byte:
+                cell += (byte & -byte).bit_length() - 1 # Lowest set bit
+                return cell if cell < end else -1
+            # Skip the rest of this byte and every empty byte after it in one go
+            index = (cell >> 3) + 1
+            rest = self.bits[index:(end + 7) >> 3]
+            cell = (index + len(rest) - len(rest.lstrip(b"\0"))) << 3
+        return -1
+
+# Sparse free cells class, used instead of FreeCells on huge boards where listing every free cell would take gigabytes
+# A cell is free if the grid doesn't have the snake on it and it isn't one of the few other taken cells (the fruits),
+# so the memory used only depends on the number of fruits
+class SparseFreeCells:
+    def __init__(self, first, size, grid):
+        self.first = first
+        self.size = size
+        self.grid = grid # The engine's grid, shared and not copied
+        self.taken = set() # Taken cells the grid doesn't know about, the fruits
+
+    def __contains__(self, cell):
+        return self.first <= cell < self.size and not self.grid[cell] and cell not in self.taken
+
+    # Function to mark a cell as free, the engine clears it in the grid itself
+    def add(self, cell):
+        self.taken.discard(cell)
+
+    # Function to mark a cell as taken, cells the snake is on are already taken in the grid
+    def remove(self, cell):
+        if self.first <= cell < self.size and not self.grid[cell]:
+            self.taken.add(cell)
+
+    # Function to make an independent copy of the free cells, for the same grid
+    def copy(self):
+        free = SparseFreeCells(self.first, self.size, self.grid)
+        free.taken = set(self.taken)
+        return free
+
+    # Function to pick a random free cell, None if the board is full
+    # Random cells are tried first, which almost always works because a huge board is mostly empty
+    def sample(self, rng):
+        span = self.size - self.first
+        for _ in range(MAX_SPAWN_TRIES):
+            cell = self.first + rng.randrange(span)
+            if cell in self:
+                return cell
+        start = rng.randrange(span)
+        for i in range(span):
+            cell = self.first + (start + i) % span
+            if cell in self:
+                return cell
+        return None
+
+# Snake engine class
+class SnakeEngine:
+    def __init__(self, width=800, height=600, grid_size=10, top_bar_height=50):
+        self.cols = width // grid_size # Number of columns on the board
+        self.rows = height // grid_size # Number of rows on the board
+        self.top_row = top_bar_height // grid_size # First row below the top bar
+
+        # Each cell is packed into a single index (y * cols + x) so the body and grid stay flat
+        self.body = deque() # Cell indices of the snake, the head is at the left end
+        size = self.cols * self.rows
+        if size <= HUGE_BOARD_CELLS:
+            self.grid = bytearray(size) # 1 where the snake occupies a cell
+            self.empty_board = FreeCells(self.cell(0, self.top_row), size) # Copied on every reset, which is faster than building it
+        else:
+            # A 10,000x10,000 board takes 12.5 MB this way, the snake and fruits only add to it as they grow
+            self.grid = BitGrid(size)
+            self.empty_board = SparseFreeCells(self.cell(0, self.top_row), size, self.grid)
+        self.profiler = None # FrameProfiler the ticks are timed with, see profiler.py
+        self.reset()
+
+    # Function to start a new game, the same seed always plays out the same game
+    def reset(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(63) # Pick a seed so the game can still be replayed
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.direction = 'RIGHT'
+        self.score = 0
+        self.snake_speed = START_SPEED
+        self.ticks = 0
+        self.done = False
+        self.last_tail = None # The cell the tail moved out of on the last tick, None if the snake grew
+        # Clear only the cells the last snake occupied instead of the whole grid
+        for cell in self.body:
+            self.grid[cell] = 0
+        self.body.clear()
+        self.free = self.empty_board.copy() # Cells holding neither the snake nor a fruit
+        for x in range(10, 6, -1):
+            cell = self.cell(x, self.top_row)
+            self.body.append(cell)
+            self.grid[cell] = 1
+            self.free.remove(cell)
+
+        self.fruits = []
+        self.spawn_fruit()
+        return self.state()
+
+    # Function to put the snake on the board at the given positions (head first), used to set up benchmarks and tests
+    def place_snake(self, positions, direction):
+        for cell in self.body:
+            self.grid[cell] = 0
+            self.free.add(cell)
+        self.body.clear()
+        for x, y in positions:
+            cell = self.cell(x, y)
+            self.body.append(cell)
+            self.grid[cell] = 1
+            self.free.remove(cell)
+        self.direction = direction
+        self.last_tail = None
+
+        # Fruits that ended up under the snake are moved somewhere free
+        covered = [fruit for fruit in self.fruits if self.grid[self.cell(*fruit)]]
+        for fruit in covered:
+            self.fruits.remove(fruit)
+            self.spawn_fruit()
+
+    # Function to place a new fruit on a random free cell, nothing is placed when the board is full
+    def spawn_fruit(self):
+        cell = self.free.sample(self.rng)
+        if cell is None:
+            return None
+        self.free.remove(cell)
+        fruit = self.position(cell)
+        self.fruits.append(fruit)
+        return fruit
+
+    # Function to copy everything needed to carry on the game from this point later
+    def snapshot(self):
+        return (tuple(self.body), self.direction, self.score, self.snake_speed, self.ticks, self.done, self.last_tail,
+                tuple(self.fruits), self.rng.getstate(), self.free.copy())
+
+    # Function to go back to a point saved with snapshot()
+    def restore(self, snapshot):
+        body, self.direction, self.score, self.snake_speed, self.ticks, self.done, self.last_tail, fruits, rng_state, free = snapshot
+        for cell in self.body:
+            self.grid[cell] = 0
+        self.body = deque(body)
+        for cell in self.body:
+            self.grid[cell] = 1
+        self.fruits = list(fruits)
+        self.rng.setstate(rng_state)
+
+        # The order of the free cells decides where fruits spawn, so it is restored exactly
+        self.free = free.copy()
+
+    # Function to pack a position into a cell index
+    def cell(self, x, y):
+        return y * self.cols + x
+
+    # Function to unpack a cell index into a position
+    def position(self, cell):
+        return (cell % self.cols, cell // self.cols)
+
+    # Function to get the position of the snake's head
+    def head(self):
+        return self.position(self.body[0])
+
+    # Function to iterate over the positions of the snake from head to tail
+    def body_positions(self):
+        cols = self.cols
+        for cell in self.body:
+            yield (cell % cols, cell // cols)
+
+    # Function to check if the snake occupies a position
+    def is_occupied(self, x, y):
+        return not self.is_wall(x, y) and self.grid[y * self.cols + x] == 1
+
+    # Function to get a snapshot of the game
+    def state(self):
+        return SnakeState(self.head(), self.direction, len(self.body), self.score,
+                          self.snake_speed, tuple(self.fruits), self.ticks)
+
+    # Function to check if a cell is outside the play area
+    def is_wall(self, x, y):
+        return x < 0 or x >= self.cols or y < self.top_row or y >= self.rows
+
+    # Function to advance the game by one tick, action is a direction name or None to keep going
+    def step(self, action=None):
+        reward = self.move(action)
+        return self.state(), reward, self.done
+
+    # Function to advance the game by one tick without taking a snapshot, returns the points scored
+    # Used by loops that run many ticks and only look at the engine now and then
+    def move(self, action=None):
+        if self.done:
+            return 0
+        profiler = self.profiler # Times each part of the tick, None unless the game is being profiled
+
+        # Change direction unless it would reverse the snake
+        if action in DIRECTIONS and action != OPPOSITES[self.direction]:
+            self.direction = action
+
+        dx, dy = DIRECTIONS[self.direction]
+        cols = self.cols
+        cell = self.body[0]
+        head = (cell % cols + dx, cell // cols + dy)
+        self.ticks += 1
+
+        # The snake dies when it runs into the walls
+        if head[0] < 0 or head[0] >= cols or head[1] < self.top_row or head[1] >= self.rows:
+            self.done = True
+            return 0
+
+        cell = head[1] * cols + head[0]
+        self.body.appendleft(cell)
+        self.last_tail = None
+
+        if head in self.fruits:
+            self.fruits.remove(head)
+            self.score += FRUIT_SCORE
+            self.snake_speed += 1
+            self.grid[cell] = 1 # Taken before spawning so the new fruit can't land on the head
+            self.spawn_fruit()
+            if self.score % BONUS_FRUIT_EVERY == 0:
+                self.spawn_fruit()
+            if profiler is not None:
+                profiler.lap(FRUIT)
+            return FRUIT_SCORE
+
+        # The tail moves out of its cell before the head moves in
+        tail = self.body.pop()
+        self.grid[tail] = 0
+        self.free.add(tail)
+        self.last_tail = (tail % cols, tail // cols)
+        if profiler is not None:
+            profiler.lap(MOVE)
+
+        # The snake dies when it runs into itself
+        if self.grid[cell]:
+            self.done = True
+        self.grid[cell] = 1
+        self.free.remove(cell)
+        if profiler is not None:
+            profiler.lap(COLLISION)
+        return 0
+
+    # Function to run a whole game with a policy, policy(engine) returns the next action
+    def run(self, policy=None, max_ticks=None):
+        while not self.done and (max_ticks is None or self.ticks < max_ticks):
+            self.move(policy(self) if policy else None)
+        return self.state()
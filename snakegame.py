@@ -1,32 +1,50 @@
 # Description: A simple snake game using Pygame
+# Usage: python snakegame.py [--headless] [--startup-time] [--profile FILE] [--board COLSxROWS]
 # Imports
-import pygame
 import time
-import random
+startup_start = time.perf_counter() # Start time of the imports, they are the slowest part of starting the game
+import argparse
 import json
+import pygame
 import os
 import math
 
-# Initialize Pygame 
-pygame.init() # Initialize Pygame
+from autopilot import Autopilot
+from profiler import INPUT, FrameProfiler
+from renderer import ChunkRenderer, DirtyRenderer
+from replay import ReplayWriter
+from scenes import CONFIRM_RESET, GAME_OVER, HOME, PLAYING, QUIT, run_scenes
+from score_store import HighScoreStore
+from snake_engine import SnakeEngine
+from text_cache import TEXT_CACHE, render_text
+
+# Path to the high scores database, scores from the old JSON file are moved into it the first time it is opened
+high_scores_path = os.path.join(os.path.expanduser("~"), "high_scores.db")
+legacy_high_scores_path = os.path.join(os.path.expanduser("~"), "high_scores.json")
+
+# Folder the replays of every game are saved in
+replays_path = os.path.join(os.path.expanduser("~"), "snake_replays")
 
-# Path to the high scores file
-high_scores_path = os.path.join(os.path.expanduser("~"), "high_scores.json")
+# Where the font files found on this computer are remembered between runs
+font_cache_path = os.path.join(os.path.expanduser("~"), ".snake_fonts.json")
 
 # Constants
 WIDTH, HEIGHT = 800, 600 # The width and height of the window
 TOP_BAR_HEIGHT = 50 # The height of the top bar
 FRUIT_PADDING = 40
 GRID_SIZE = 10  # Size of the grid cells
-
-# Window
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Snake Game")
-
-# Fonts
-LABEL_FONT = pygame.font.SysFont("comicsans", 26)
-TITLE_FONT = pygame.font.SysFont("comicsans", 48)
-H1_FONT = pygame.font.SysFont("comicsans", 36)
+MAX_BOARD_CELLS = 10000 # Most columns or rows a board can have
+RENDER_FPS = 60 # Frames drawn per second, independent of the speed of the snake
+MAX_TICKS_PER_FRAME = 5 # Most game ticks simulated in one frame before the game is allowed to fall behind
+CURSOR_BLINK_MS = 500 # How long the cursor of the name box stays shown and then hidden
+MISSING_FONT_RECHECK = 24 * 60 * 60 # Seconds a font that isn't installed is remembered as missing before looking again
+
+# Window and fonts, created by init_display() so importing the game doesn't open a window
+WIN = None
+LABEL_FONT = None
+TITLE_FONT = None
+H1_FONT = None
+FONT_NAME = "comicsans"
 
 # Colors
 BG_COLOR = (225, 225, 225)
@@ -37,32 +55,14 @@ USER_EVENT = pygame.USEREVENT
 
 # Global variables
 player_name = ""
-high_scores = {}
-
-snake_speed = 15 # The speed of the snake
-snake_pos = [100, 50]
-snake_body = [
-                [100, 50],
-                [90, 50],
-                [80, 50],
-                [70, 50]
-            ]
-
-# Fruit class
-class Fruit:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-    def draw(self, win):
-        pygame.draw.rect(win, (255, 0, 0), pygame.Rect(self.x, self.y, GRID_SIZE, GRID_SIZE))
-
-    def collide(self, x, y):
-        return self.x == x and self.y == y
-
-# Setting default snake direction towards the right
-direction = 'RIGHT'
-change_to = direction
+board_cols, board_rows = WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE # Size of the board in cells, the first rows are under the top bar
+startup_times = {} # Seconds each step of starting the game took
+frame_profiler = None # Times every part of each frame while profiling, see profiler.py
+profile_path = None # File the frame timings are exported to, set by --profile
+show_profile = False # Whether the frame timings are shown over the board, toggled with F3
+autopilot_on = False # Whether the autopilot plays the games instead of the player, toggled on the home screen
+high_scores = None # The high score store, opened the first time it is needed
+last_game = (0, 0) # Time and score of the last game played, shown on the end screen
 
 # Function to format time in minutes, seconds and milliseconds
 def format_time(secs):
@@ -78,86 +78,122 @@ score = 0 # Initialize the score
 def draw_top_bar(win, elapsed_time, score):
     # Draw the top bar
     pygame.draw.rect(win, TOP_BAR_COLOR, (0, 0, WIDTH, TOP_BAR_HEIGHT))
-    time_label = LABEL_FONT.render(f"Time: {format_time(elapsed_time)}", 1, "white")
 
     #Labels
-    score_label = LABEL_FONT.render(f"Score: {score}", 1, "white")
+    score_label = render_text(LABEL_FONT, f"Score: {score}", "white") # Only rasterized again when the score changes
 
-    # Draw the labels
-    win.blit(time_label, (10, 5))
+    # Draw the labels, the timer changes every frame so it is drawn from cached digits
+    TEXT_CACHE.blit_glyphs(win, LABEL_FONT, f"Time: {format_time(elapsed_time)}", "white", (10, 5))
     win.blit(score_label, ((780 - score_label.get_width() // 2) - (score_label.get_width() - score_label.get_width() // 2), 5))
 
-# Function for the home screen
+# Function for the home screen, returns the next screen
 def home_screen(win):
     # Global variables
-    global player_name
+    global player_name, autopilot_on
     run = True
     user_input = ""
     is_displayed_name = False
+    redraw = True # Only draw the screen again when something on it changed
+    cursor_start = time.perf_counter() # The cursor is shown straight away and after every key press
+    drawn_cursor = None
+
+    # Start Button
+    start_button_width, start_button_height = 200, 50
+    start_button_x = WIDTH // 2 - start_button_width // 2
+    start_button_y = 300
+
+    # Input Box
+    input_box_width, input_box_height = start_button_width, start_button_height
+    input_box_x = start_button_x
+    input_box_y = 425
+    input_box = pygame.Rect(input_box_x, input_box_y, input_box_width, input_box_height)
+
+    # Autopilot Button
+    autopilot_button_width, autopilot_button_height = start_button_width, start_button_height
+    autopilot_button_x = start_button_x
+    autopilot_button_y = 500
+
+    # Calculate the maximum number of characters that can fit in the input box
+    max_chars = input_box_width // LABEL_FONT.size('O')[0]
 
     # Main loop
     while run:
-        win.fill(BG_COLOR)
+        blink_time = int((time.perf_counter() - cursor_start) * 1000) # Milliseconds since the cursor was last reset
+        cursor_visible = blink_time // CURSOR_BLINK_MS % 2 == 0
+
+        if redraw or cursor_visible != drawn_cursor:
+            win.fill(BG_COLOR)
 
-        # Title
-        title_label = TITLE_FONT.render("Snake Game", 1, ("#1DB30E"))
-        win.blit(title_label, (WIDTH//2 - title_label.get_width()//2, 100))
+            # Title
+            title_label = render_text(TITLE_FONT, "Snake Game", ("#1DB30E"))
+            win.blit(title_label, (WIDTH//2 - title_label.get_width()//2, 100))
 
-        # Start Button
-        start_button_width, start_button_height = 200, 50
-        start_button_x = WIDTH // 2 - start_button_width // 2
-        start_button_y = 300
-        pygame.draw.rect(win, ("#1DB30E"), (start_button_x, start_button_y, start_button_width, start_button_height))
-        start_button_text = LABEL_FONT.render("Start", 1, "white")
-        win.blit(start_button_text, (start_button_x + start_button_width // 2 - start_button_text.get_width() // 2, 
-                               start_button_y + start_button_height // 2 - start_button_text.get_height() // 2))
+            # Start Button
+            pygame.draw.rect(win, ("#1DB30E"), (start_button_x, start_button_y, start_button_width, start_button_height))
+            start_button_text = render_text(LABEL_FONT, "Start", "white")
+            win.blit(start_button_text, (start_button_x + start_button_width // 2 - start_button_text.get_width() // 2, 
+                                   start_button_y + start_button_height // 2 - start_button_text.get_height() // 2))
 
-        # Ask for player's name
-        name_label = LABEL_FONT.render("Enter your name:", 1, ("#1DB30E"))
-        win.blit(name_label, (WIDTH // 2 - 100, 375))
+            # Ask for player's name
+            name_label = render_text(LABEL_FONT, "Enter your name:", ("#1DB30E"))
+            win.blit(name_label, (WIDTH // 2 - 100, 375))
 
-        # Input Box
-        input_box_width, input_box_height = start_button_width, start_button_height
-        input_box_x = start_button_x
-        input_box_y = 425
-        input_box = pygame.Rect(input_box_x, input_box_y, input_box_width, input_box_height)
-        pygame.draw.rect(win, ("#1DB30E"), input_box, 2)
+            # Input Box
+            pygame.draw.rect(win, ("#1DB30E"), input_box, 2)
 
-        # Calculate the maximum number of characters that can fit in the input box
-        max_chars = input_box_width // LABEL_FONT.size('O')[0]
+            # Trim the user input if it exceeds the maximum number of characters
+            trimmed_user_input = user_input[:max_chars]
 
-        # Trim the user input if it exceeds the maximum number of characters
-        trimmed_user_input = user_input[:max_chars]
+            # Render the user input
+            text_surface = render_text(LABEL_FONT, trimmed_user_input, ("#1DB30E"))
+            win.blit(text_surface, (input_box.x + 10, input_box.y + 5))
 
-        # Render the user input
-        text_surface = LABEL_FONT.render(trimmed_user_input, True, ("#1DB30E"))
-        win.blit(text_surface, (input_box.x + 10, input_box.y + 5))
+            # Draw the cursor after the text
+            if cursor_visible:
+                cursor_x = input_box.x + 10 + text_surface.get_width() + 2
+                pygame.draw.line(win, ("#1DB30E"), (cursor_x, input_box.y + 5), (cursor_x, input_box.y + 5 + LABEL_FONT.get_height()), 2)
 
-        
-        # Render error messages
-        if is_displayed_name:
-            error_message_name = LABEL_FONT.render("Please enter your name.", 1, "red")
-            win.blit(error_message_name, (WIDTH // 2 - error_message_name.get_width() // 2, 465))
+            # Render error messages
+            if is_displayed_name:
+                error_message_name = render_text(LABEL_FONT, "Please enter your name.", "red")
+                win.blit(error_message_name, (WIDTH // 2 - error_message_name.get_width() // 2, 465))
 
+            # Autopilot Button, filled in while the autopilot is on
+            pygame.draw.rect(win, ("#1DB30E"), (autopilot_button_x, autopilot_button_y, autopilot_button_width, autopilot_button_height), 0 if autopilot_on else 2)
+            autopilot_button_text = render_text(LABEL_FONT, "Autopilot: On" if autopilot_on else "Autopilot: Off", "white" if autopilot_on else ("#1DB30E"))
+            win.blit(autopilot_button_text, (autopilot_button_x + autopilot_button_width // 2 - autopilot_button_text.get_width() // 2,
+                                       autopilot_button_y + autopilot_button_height // 2 - autopilot_button_text.get_height() // 2))
 
-        # Update the display
-        pygame.display.update()
+            # Update the display
+            pygame.display.update()
+            redraw = False
+            drawn_cursor = cursor_visible
+
+        # Sleep until there is input or the cursor has to blink, then handle everything that came in
+        events = [pygame.event.wait(CURSOR_BLINK_MS - blink_time % CURSOR_BLINK_MS)] + pygame.event.get()
 
         # Event Handling
-        for event in pygame.event.get():
+        for event in events:
             # Handle window close button
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                return QUIT
+
+            # Draw everything again if the window was covered up
+            if event.type == pygame.WINDOWEXPOSED:
+                redraw = True
             
             # Handle mouse clicks
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_x, mouse_y = pygame.mouse.get_pos() # Get the mouse position
                 if start_button_x <= mouse_x <= start_button_x + start_button_width and start_button_y <= mouse_y <= start_button_y + start_button_height:
                     is_displayed_name = not user_input.strip() # Check if the player's name is entered
+                    redraw = True
                     if not is_displayed_name:
                         player_name = user_input.strip() # Set the player's name
                         run = False  # Exit the loop
+                if autopilot_button_x <= mouse_x <= autopilot_button_x + autopilot_button_width and autopilot_button_y <= mouse_y <= autopilot_button_y + autopilot_button_height:
+                    autopilot_on = not autopilot_on
+                    redraw = True
             
             # Handle key presses
             if event.type == pygame.KEYDOWN:
@@ -165,26 +201,20 @@ def home_screen(win):
                     user_input = user_input[:-1]    # Remove the last character
                 else:
                     user_input += event.unicode # Add the character to the user input
+                redraw = True
+                cursor_start = time.perf_counter()
 
-# Function to display the end screen
-def end_screen(win, elapsed_time, score, player_name, high_scores, high_scores_dic):
-    win.fill(BG_COLOR)
-
-    # Update high score for the current player
-    if player_name in high_scores_dic:
-        if score > high_scores_dic[player_name]:
-            high_scores[player_name] = (score) # Update the high score
-    else:
-        high_scores[player_name] = (score) # Add the player to the high scores
+    return PLAYING
 
-    # Save the updated high scores
-    save_high_scores()
+# Function to display the end screen, returns the next screen
+def end_screen(win, elapsed_time, score):
+    win.fill(BG_COLOR)
 
     # Render the end screen
-    title_label = TITLE_FONT.render("Game Over", 1, TEXT_COLOR)
-    stats_label = H1_FONT.render("Stats", 1, TEXT_COLOR)
-    time_label = LABEL_FONT.render(f"Time: {format_time(elapsed_time)}", 1, TEXT_COLOR)
-    score_label = LABEL_FONT.render(f"Score: {score}", 1, TEXT_COLOR)
+    title_label = render_text(TITLE_FONT, "Game Over", TEXT_COLOR)
+    stats_label = render_text(H1_FONT, "Stats", TEXT_COLOR)
+    time_label = render_text(LABEL_FONT, f"Time: {format_time(elapsed_time)}", TEXT_COLOR)
+    score_label = render_text(LABEL_FONT, f"Score: {score}", TEXT_COLOR)
 
     # Render the labels
     win.blit(title_label, (get_middle(title_label), 25))
@@ -193,22 +223,19 @@ def end_screen(win, elapsed_time, score, player_name, high_scores, high_scores_d
     win.blit(score_label, (stats_label.get_width() // 2, win.get_height() // 2 - 50))
 
     # Render high scores
-    high_scores_label = H1_FONT.render("High Scores", 1, TEXT_COLOR)
-    sorted_scores = sorted(high_scores_dic.items(), key=lambda x: x[1], reverse=True)  # Sort by score
+    high_scores_label = render_text(H1_FONT, "High Scores", TEXT_COLOR)
+    top_scores = get_high_scores().top(5)  # The five best scores, highest first
     win.blit(high_scores_label, ((750 - high_scores_label.get_width() // 2) - (high_scores_label.get_width() - high_scores_label.get_width() // 2), 100))
-    for idx, (player_name, high_scores) in enumerate(sorted_scores):
-        score_label = LABEL_FONT.render(f"{idx + 1}. {player_name}: {high_scores}", 1, TEXT_COLOR)  # Render the high scores
+    for idx, (top_player, top_score) in enumerate(top_scores):
+        score_label = render_text(LABEL_FONT, f"{idx + 1}. {top_player}: {top_score}", TEXT_COLOR)  # Render the high scores
         win.blit(score_label, ((700 - high_scores_label.get_width() // 2) - (high_scores_label.get_width() - high_scores_label.get_width() // 2), win.get_height() // 2 - 100 + idx * 30))  # Position the high scores
-        if idx + 1 == 5:
-            win.blit(LABEL_FONT.render("", 1, TEXT_COLOR), (850, 200 + (idx + 1) * 30))  # Render the ellipsis
-            break
 
     # Main Button
     main_button_width, main_button_height = 200, 50
     main_button_x = get_middle(high_scores_label)
     main_button_y = 500
     pygame.draw.rect(win, TEXT_COLOR, (main_button_x, main_button_y, main_button_width, main_button_height))  # Draw the button
-    main_button_text = LABEL_FONT.render("Main Menu", 1, "white")
+    main_button_text = render_text(LABEL_FONT, "Main Menu", "white")
     win.blit(main_button_text, (main_button_x + main_button_width // 2 - main_button_text.get_width() // 2, 
                                main_button_y + main_button_height // 2 - main_button_text.get_height() // 2))  # Position the button
 
@@ -217,7 +244,7 @@ def end_screen(win, elapsed_time, score, player_name, high_scores, high_scores_d
     reset_high_score_button_x = (750 - high_scores_label.get_width() // 2) - (high_scores_label.get_width() - high_scores_label.get_width() // 2)
     reset_high_score_button_y = 500
     pygame.draw.rect(win, TEXT_COLOR, (reset_high_score_button_x, reset_high_score_button_y, reset_high_score_button_width, reset_high_score_button_height)) # Draw the button
-    reset_high_score_button_text = LABEL_FONT.render("Reset High Score", 1, "white")
+    reset_high_score_button_text = render_text(LABEL_FONT, "Reset High Score", "white")
     win.blit(reset_high_score_button_text, (reset_high_score_button_x + reset_high_score_button_width // 2 - reset_high_score_button_text.get_width() // 2, 
                                reset_high_score_button_y + reset_high_score_button_height // 2 - reset_high_score_button_text.get_height() // 2)) # Position the button
 
@@ -226,158 +253,208 @@ def end_screen(win, elapsed_time, score, player_name, high_scores, high_scores_d
     restart_button_x = 50
     restart_button_y = 500
     pygame.draw.rect(win, TEXT_COLOR, (restart_button_x, restart_button_y, restart_button_width, restart_button_height)) # Draw the button
-    restart_button_text = LABEL_FONT.render("Restart", 1, "white")
+    restart_button_text = render_text(LABEL_FONT, "Restart", "white")
     win.blit(restart_button_text, (restart_button_x + restart_button_width // 2 - restart_button_text.get_width() // 2, 
                                restart_button_y + restart_button_height // 2 - restart_button_text.get_height() // 2)) # Position the button
 
 
     pygame.display.update()  # Update the display
 
-    run_end = True  # Run the end screen
-
-    # Main loop
-    while run_end:
+    # Main loop, nothing on the screen moves so it sleeps until there is input
+    while True:
         # Event Handling
-        for event in pygame.event.get():
+        for event in [pygame.event.wait()] + pygame.event.get():
             # Handle window close button
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                return QUIT
+            # Show the screen again if the window was covered up
+            if event.type == pygame.WINDOWEXPOSED:
+                pygame.display.update()
             # Handle mouse clicks
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_x, mouse_y = pygame.mouse.get_pos()  # Get the mouse position
                 if main_button_x <= mouse_x <= main_button_x + main_button_width and main_button_y <= mouse_y <= main_button_y + main_button_height:
-                    run_end = False  # Exit the loop
-                    start_game()  # Goes back to home screen
+                    return HOME  # Goes back to home screen
                     
                 if restart_button_x <= mouse_x <= restart_button_x + restart_button_width and restart_button_y <= mouse_y <= restart_button_y + restart_button_height:
-                    run_end = False  # Exit the loop
-                    main(WIN)  # Goes back to home screen
+                    return PLAYING  # Plays again
 
                 # Reset High Score Button
                 if reset_high_score_button_x <= mouse_x <= reset_high_score_button_x + reset_high_score_button_width and reset_high_score_button_y <= mouse_y <= reset_high_score_button_y + reset_high_score_button_height:
-                    win.fill(BG_COLOR)  # Clear the screen
-
-                    # Render the reset high score screen
-                    title_text = "Are you sure you want to reset your high scores?"
-                    title_lines = title_text.split(" ")  # Split the text into words
-                    line1 = " ".join(title_lines[:6])  # First line
-                    line2 = " ".join(title_lines[6:])  # Second line
-
-                    title_label1 = H1_FONT.render(line1, 1, TEXT_COLOR)
-                    title_label2 = H1_FONT.render(line2, 1, TEXT_COLOR)
-
-                    win.blit(title_label1, (get_middle(title_label1), 150))
-                    win.blit(title_label2, (get_middle(title_label2), 200))
-
-                    # Yes Button
-                    yes_button_width, yes_button_height = 200, 50
-                    yes_button_x = 100
-                    yes_button_y = 400
-                    pygame.draw.rect(win, TEXT_COLOR, (yes_button_x, yes_button_y, yes_button_width, yes_button_height))  # Draw the button
-                    yes_button_text = LABEL_FONT.render("Yes", 1, "white")
-                    win.blit(yes_button_text, (yes_button_x + yes_button_width // 2 - yes_button_text.get_width() // 2, 
-                                               yes_button_y + yes_button_height // 2 - yes_button_text.get_height() // 2))  # Position the button
-
-                    # No Button
-                    no_button_width, no_button_height = 200, 50
-                    no_button_x = (700 - no_button_width // 2) - (no_button_width - no_button_width // 2)
-                    no_button_y = 400
-                    pygame.draw.rect(win, TEXT_COLOR, (no_button_x, no_button_y, no_button_width, no_button_height))  # Draw the button
-                    no_button_text = LABEL_FONT.render("No", 1, "white")
-                    win.blit(no_button_text, (no_button_x + no_button_width // 2 - no_button_text.get_width() // 2, 
-                                              no_button_y + no_button_height // 2 - no_button_text.get_height() // 2))  # Position the button
-                    pygame.display.update()  # Update the display
-
-                    confirm_reset = True  # Confirm the reset
-
-                    # Main loop
-                    while confirm_reset:
-                        # Handle window close button
-                        for event in pygame.event.get():
-                            if event.type == pygame.QUIT:
-                                pygame.quit()
-                                exit()
-                            # Handle mouse clicks
-                            if event.type == pygame.MOUSEBUTTONDOWN:
-                                mouse_x, mouse_y = pygame.mouse.get_pos()  # Get the mouse position
-                                if yes_button_x <= mouse_x <= yes_button_x + yes_button_width and yes_button_y <= mouse_y <= yes_button_y + yes_button_height:
-                                    high_scores_dic.clear()  # Clear the high scores
-                                    save_high_scores()  # Save the empty high scores
-                                    confirm_reset = False  # Confirms the reset
-                                    run_end = False  # Exit the loop
-                                    start_game()  # Restart the game
-
-                                # No Button
-                                if no_button_x <= mouse_x <= no_button_x + no_button_width and no_button_y <= mouse_y <= no_button_y + no_button_height:
-                                    confirm_reset = False  # Doesn't confirm the reset
-                                    end_screen(win, elapsed_time, score, player_name, high_scores, high_scores_dic)  # Display the end screen
+                    return CONFIRM_RESET  # Asks before resetting
+
+# Function to ask before resetting the high scores, returns the next screen
+def confirm_reset_screen(win):
+    win.fill(BG_COLOR)  # Clear the screen
+
+    # Render the reset high score screen
+    title_text = "Are you sure you want to reset your high scores?"
+    title_lines = title_text.split(" ")  # Split the text into words
+    line1 = " ".join(title_lines[:6])  # First line
+    line2 = " ".join(title_lines[6:])  # Second line
+
+    title_label1 = render_text(H1_FONT, line1, TEXT_COLOR)
+    title_label2 = render_text(H1_FONT, line2, TEXT_COLOR)
+
+    win.blit(title_label1, (get_middle(title_label1), 150))
+    win.blit(title_label2, (get_middle(title_label2), 200))
+
+    # Yes Button
+    yes_button_width, yes_button_height = 200, 50
+    yes_button_x = 100
+    yes_button_y = 400
+    pygame.draw.rect(win, TEXT_COLOR, (yes_button_x, yes_button_y, yes_button_width, yes_button_height))  # Draw the button
+    yes_button_text = render_text(LABEL_FONT, "Yes", "white")
+    win.blit(yes_button_text, (yes_button_x + yes_button_width // 2 - yes_button_text.get_width() // 2, 
+                               yes_button_y + yes_button_height // 2 - yes_button_text.get_height() // 2))  # Position the button
+
+    # No Button
+    no_button_width, no_button_height = 200, 50
+    no_button_x = (700 - no_button_width // 2) - (no_button_width - no_button_width // 2)
+    no_button_y = 400
+    pygame.draw.rect(win, TEXT_COLOR, (no_button_x, no_button_y, no_button_width, no_button_height))  # Draw the button
+    no_button_text = render_text(LABEL_FONT, "No", "white")
+    win.blit(no_button_text, (no_button_x + no_button_width // 2 - no_button_text.get_width() // 2, 
+                              no_button_y + no_button_height // 2 - no_button_text.get_height() // 2))  # Position the button
+    pygame.display.update()  # Update the display
+
+    # Main loop, nothing on the screen moves so it sleeps until there is input
+    while True:
+        for event in [pygame.event.wait()] + pygame.event.get():
+            # Handle window close button
+            if event.type == pygame.QUIT:
+                return QUIT
+            # Show the screen again if the window was covered up
+            if event.type == pygame.WINDOWEXPOSED:
+                pygame.display.update()
+            # Handle mouse clicks
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_x, mouse_y = pygame.mouse.get_pos()  # Get the mouse position
+                if yes_button_x <= mouse_x <= yes_button_x + yes_button_width and yes_button_y <= mouse_y <= yes_button_y + yes_button_height:
+                    get_high_scores().clear()  # Clear the high scores
+                    return HOME  # Back to the home screen
+
+                # No Button
+                if no_button_x <= mouse_x <= no_button_x + no_button_width and no_button_y <= mouse_y <= no_button_y + no_button_height:
+                    return GAME_OVER  # Back to the end screen
+
+# Function to find the file of a system font, None if it isn't installed
+# Looking a font up scans every installed font, so the answer is saved and later runs skip the scan. A font that wasn't
+# found is saved as the time it was looked for, so one installed later is found once that is MISSING_FONT_RECHECK old
+def find_font(name):
+    try:
+        with open(font_cache_path, "r") as file:
+            fonts = json.load(file)
+    except (FileNotFoundError, ValueError):
+        fonts = {}
+
+    path = fonts.get(name)
+    if isinstance(path, str) and os.path.exists(path):
+        return path
+    if isinstance(path, (int, float)) and 0 <= time.time() - path < MISSING_FONT_RECHECK:
+        return None
+
+    path = pygame.font.match_font(name)
+    fonts[name] = path or time.time()
+    try:
+        with open(font_cache_path, "w") as file:
+            json.dump(fonts, file)
+    except OSError:
+        pass # The font is just looked up again next time
+    return path
+
+# Function to open the window and load the fonts, the first time it is called
+# Headless mode draws into a window that is never shown, for bots, tools and timing the startup
+def init_display(headless=False):
+    global WIN, LABEL_FONT, TITLE_FONT, H1_FONT
+    if WIN is not None:
+        return WIN
+    startup_times["imports"] = time.perf_counter() - startup_start
+
+    start = time.perf_counter()
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    # Only the parts of Pygame the game uses, pygame.init() would also start the sound system
+    pygame.display.init()
+    pygame.font.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Snake Game")
+    startup_times["display"] = time.perf_counter() - start
+
+    # Fonts, the default Pygame font is used if Comic Sans isn't installed
+    start = time.perf_counter()
+    font_path = find_font(FONT_NAME)
+    LABEL_FONT = pygame.font.Font(font_path, 26)
+    TITLE_FONT = pygame.font.Font(font_path, 48)
+    H1_FONT = pygame.font.Font(font_path, 36)
+    startup_times["fonts"] = time.perf_counter() - start
+    return WIN
+
+# Function to show or hide the frame timings, frames are only timed while they are shown or exported
+def toggle_profile():
+    global frame_profiler, show_profile
+    show_profile = not show_profile
+    if show_profile and frame_profiler is None:
+        frame_profiler = FrameProfiler()
+    if not show_profile and profile_path is None:
+        frame_profiler = None
+    return frame_profiler
 
 # Function to get the middle of the screen
 def get_middle(surface):
     return WIDTH / 2 - surface.get_width()/2 # Return the middle of the screen
 
-# Function to load high scores from a JSON file
-def load_high_scores():
-    # Global variables
-    global high_scores 
-    try:
-        with open(high_scores_path, "r") as file:
-            high_scores = json.load(file) # Load the high scores from the file
-            high_scores = {player: int(data[0]) if isinstance(data, list) else int(data) for player, data in high_scores.items()}
-    except FileNotFoundError:
-        high_scores = {} # Create an empty dictionary if the file does not exist
-
-# Function to save high scores to a JSON file
-def save_high_scores():
-    with open(high_scores_path, "w") as file:
-        json.dump(high_scores, file) # Save the high scores to the file
-
-# Game function
-def main(win):
-    load_high_scores() # Load the high scores
-
-    global snake_speed
-    global change_to
-    global direction
-    global snake_pos
-    global snake_body
-    global fruits_pos
-    global Fruit
-
-    # Function to spawn a new fruit
-    def spawn_fruit():
-        x = random.randint(0, (WIDTH - GRID_SIZE) // GRID_SIZE) * GRID_SIZE
-        y = random.randint(TOP_BAR_HEIGHT // GRID_SIZE, (HEIGHT - GRID_SIZE) // GRID_SIZE) * GRID_SIZE
-        return Fruit(x, y)
-
-    # Initialize game variables
-    score = 0
-    start_time = time.time()
-    direction = 'RIGHT'
-    change_to = direction
-    snake_speed = 15  # Set a reasonable initial speed
-    snake_pos = [100, 50]
-    snake_body = [
-        [100, 50],
-        [90, 50],
-        [80, 50],
-        [70, 50]
-    ]
-    fruits_pos = [spawn_fruit()]
-
-    clock = pygame.time.Clock()
+# Function to get the high score store, it is only opened once per run of the game
+def get_high_scores():
+    global high_scores
+    if high_scores is None:
+        high_scores = HighScoreStore(high_scores_path, legacy_high_scores_path)
+    return high_scores
+
+# Game function, returns the next screen
+# frame_time() returns the seconds since the last frame, by default it waits for the next one at RENDER_FPS, so a test
+# can play games at full speed by handing it a fixed time step
+def main(win, frame_time=None):
+    global last_game
+
+    # The game rules live in the engine, this loop only handles input and drawing
+    engine = SnakeEngine(board_cols * GRID_SIZE, board_rows * GRID_SIZE, GRID_SIZE, TOP_BAR_HEIGHT)
+    engine.reset()
+    change_to = engine.direction
+    autopilot = Autopilot(engine) if autopilot_on else None # Steers instead of the arrow keys when it is on
+
+    # Every game is recorded so it can be watched again and its score checked
+    os.makedirs(replays_path, exist_ok=True)
+    recorder = ReplayWriter(os.path.join(replays_path, f"{int(time.time() * 1000)}.snkr"), engine)
+
+    # Only the cells that change are redrawn each frame, a board bigger than the window scrolls with the head instead
+    if board_cols * GRID_SIZE <= WIDTH and board_rows * GRID_SIZE <= HEIGHT:
+        renderer = DirtyRenderer(win, GRID_SIZE, BG_COLOR, TEXT_COLOR, TOP_BAR_HEIGHT, draw_top_bar)
+    else:
+        renderer = ChunkRenderer(win, GRID_SIZE, BG_COLOR, TEXT_COLOR, TOP_BAR_HEIGHT, draw_top_bar)
 
-    run = True
+    # The engine and renderer only time themselves while there is a profiler
+    profiler = engine.profiler = renderer.profiler = frame_profiler
+    renderer.overlay = profiler.draw_overlay if show_profile else None
 
-    while run:
-        elapsed_time = time.time() - start_time
-        clock.tick(snake_speed)
+    # Initialize game variables
+    elapsed_time = 0.0
+    if frame_time is None:
+        clock = pygame.time.Clock()
+        frame_time = lambda: clock.tick(RENDER_FPS) / 1000
+    accumulator = 0.0 # Time that hasn't been simulated yet
+
+    while True:
+        dt = frame_time()
+        accumulator += dt
+        elapsed_time += dt
+        if profiler is not None:
+            profiler.start_frame()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                run = False
-                break
+                recorder.close(engine.score, engine.ticks)
+                return QUIT
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP:
@@ -388,76 +465,99 @@ def main(win):
                     change_to = 'LEFT'
                 if event.key == pygame.K_RIGHT:
                     change_to = 'RIGHT'
-
-        if change_to == "UP" and direction != "DOWN":
-            direction = "UP"
-        if change_to == "DOWN" and direction != "UP":
-            direction = "DOWN"
-        if change_to == "LEFT" and direction != "RIGHT":
-            direction = "LEFT"
-        if change_to == "RIGHT" and direction != "LEFT":
-            direction = "RIGHT"
-
-        if direction == "UP":
-            snake_pos[1] -= GRID_SIZE
-        if direction == "DOWN":
-            snake_pos[1] += GRID_SIZE
-        if direction == "LEFT":
-            snake_pos[0] -= GRID_SIZE
-        if direction == "RIGHT":
-            snake_pos[0] += GRID_SIZE
-
-        snake_body.insert(0, list(snake_pos))
-
-        for fruit_pos in fruits_pos:
-            if fruit_pos.collide(*snake_pos):
-                fruits_pos.remove(fruit_pos)
-                score += 10
-                snake_speed += 1
-                fruits_pos.append(spawn_fruit())
-                if score % 50 == 0:
-                    fruits_pos.append(spawn_fruit())
+                if event.key == pygame.K_F3:
+                    profiler = engine.profiler = renderer.profiler = toggle_profile()
+                    renderer.overlay = profiler.draw_overlay if show_profile else None
+                    renderer.reset() # Draw the board again where the overlay was
+                    if profiler is not None:
+                        profiler.start_frame()
+        if profiler is not None:
+            profiler.lap(INPUT)
+
+        # Advance the game in fixed ticks of 1 / snake_speed seconds, however long the frame took
+        ticks = 0
+        done = False
+        changes = [] # (head, cell the tail left) of each tick, so the renderer only redraws those cells
+        while accumulator >= 1 / engine.snake_speed and not done:
+            accumulator -= 1 / engine.snake_speed
+            if autopilot is not None:
+                change_to = autopilot(engine)
+            state, reward, done = engine.step(change_to)
+            recorder.record(engine.direction)
+            changes.append((engine.head(), engine.last_tail))
+            ticks += 1
+
+            # After a very slow frame drop the backlog instead of trying to catch up with it
+            if ticks == MAX_TICKS_PER_FRAME:
+                accumulator = 0.0
                 break
-        else:
-            snake_body.pop()
-
-        for block in snake_body[1:]:
-            if snake_pos[0] == block[0] and snake_pos[1] == block[1]:
-                end_screen(WIN, elapsed_time, score, player_name, high_scores, high_scores)
-                run = False
-                break
-
-        if snake_pos[0] >= WIDTH or snake_pos[0] < 0 or snake_pos[1] >= HEIGHT or snake_pos[1] < TOP_BAR_HEIGHT:
-            end_screen(WIN, elapsed_time, score, player_name, high_scores, high_scores)
-            run = False
-            break
-
-        win.fill(BG_COLOR)
-        for pos in snake_body:
-            pygame.draw.rect(win, TEXT_COLOR, pygame.Rect(pos[0], pos[1], GRID_SIZE, GRID_SIZE))
-
-        # Draw eyes on the head of the snake
-        head_pos = snake_body[0]
-        eye_radius = 2
-        eye_offset_x = 3
-        eye_offset_y = 3
-
-        # Left eye
-        pygame.draw.circle(win, (0, 0, 0), (head_pos[0] + eye_offset_x, head_pos[1] + eye_offset_y), eye_radius)
-        # Right eye
-        pygame.draw.circle(win, (0, 0, 0), (head_pos[0] + GRID_SIZE - eye_offset_x, head_pos[1] + eye_offset_y), eye_radius)
-
-        for fruit in fruits_pos:
-            fruit.draw(win)
-
-        draw_top_bar(win, elapsed_time, score)
-        pygame.display.update()
 
+        if done:
+            if profiler is not None:
+                profiler.end_frame(engine)
+            recorder.close(state.score, state.ticks)
+            if autopilot is None: # The autopilot's scores don't count as the player's
+                get_high_scores().submit(player_name, state.score) # Only kept if it beats the player's high score
+            last_game = (elapsed_time, state.score)
+            return GAME_OVER
+
+        # Draw the head and tail part of the way into their next cells
+        renderer.draw(engine, elapsed_time, accumulator * engine.snake_speed, changes)
+        if profiler is not None:
+            profiler.end_frame(engine)
+
+# Function to parse the size of a board, like 1000x500, into (columns, rows)
+def parse_board(text):
+    try:
+        cols, rows = (int(size) for size in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLSxROWS, like 1000x1000, not {text!r}")
+    top_rows = TOP_BAR_HEIGHT // GRID_SIZE
+    # The snake starts in the top left corner, at row top_rows, and needs room to move
+    if not (12 <= cols <= MAX_BOARD_CELLS and top_rows + 2 <= rows <= MAX_BOARD_CELLS):
+        raise argparse.ArgumentTypeError(f"boards can be from 12x{top_rows + 2} to {MAX_BOARD_CELLS}x{MAX_BOARD_CELLS} cells")
+    return cols, rows
+
+# Function to start the game, runs the screens until the window is closed
+def start_game(headless=False, profile=None, board=None):
+    global frame_profiler, profile_path, board_cols, board_rows
+    win = init_display(headless)
+    if board:
+        board_cols, board_rows = board
+    if profile:
+        profile_path = profile
+        frame_profiler = FrameProfiler(export_path=profile)
+    run_scenes({
+        HOME: lambda: home_screen(win),
+        PLAYING: lambda: main(win),
+        GAME_OVER: lambda: end_screen(win, *last_game),
+        CONFIRM_RESET: lambda: confirm_reset_screen(win)
+    })
+    if frame_profiler is not None:
+        frame_profiler.close()
     pygame.quit()
-# Function to start the game
-def start_game():
-    home_screen(WIN)
-    main(WIN)
 
-# Start the game
-start_game()
+# Function to time how long it takes until the home screen is first shown, returns the time of each step
+def measure_startup(headless=False):
+    win = init_display(headless)
+    start = time.perf_counter()
+    pygame.event.post(pygame.event.Event(pygame.QUIT)) # The home screen draws once and then closes
+    home_screen(win)
+    startup_times["first_frame"] = time.perf_counter() - start
+    startup_times["total"] = time.perf_counter() - startup_start
+    pygame.quit()
+    return startup_times
+
+# Start the game when run as a script, importing the module doesn't start it
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A simple snake game.")
+    parser.add_argument("--headless", action="store_true", help="run without showing a window")
+    parser.add_argument("--startup-time", action="store_true", help="print how long starting the game takes as JSON and quit")
+    parser.add_argument("--profile", metavar="FILE", help="time every frame and write the timings to FILE (.jsonl or .csv)")
+    parser.add_argument("--board", type=parse_board, metavar="COLSxROWS",
+                        help=f"size of the board in cells, up to {MAX_BOARD_CELLS}x{MAX_BOARD_CELLS}, bigger than the window scrolls")
+    args = parser.parse_args()
+    if args.startup_time:
+        print(json.dumps(measure_startup(args.headless)))
+    else:
+        start_game(args.headless, args.profile, args.board)
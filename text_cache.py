@@ -0,0 +1,59 @@
+# Description: Cache of rendered text surfaces so labels aren't rasterized again every frame
+# Imports
+from collections import OrderedDict
+
+# Text cache class, keeps the most recently used text surfaces up to a maximum count
+class TextCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict() # (font, text, color, antialias) -> surface, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    # Function to render text, reusing the surface if the same text was rendered before
+    def render(self, font, text, color, antialias=1):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # Drop the least recently used surface
+        return surface
+
+    # Function to draw text one character at a time from cached glyphs, for text that changes every frame like the timer
+    def blit_glyphs(self, win, font, text, color, pos, antialias=1):
+        x, y = pos
+        for char in text:
+            glyph = self.render(font, char, color, antialias)
+            win.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return x - pos[0] # The width of the drawn text
+
+    # Function to get the cache counters
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.surfaces),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    # Function to empty the cache and reset the counters
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Cache shared by all the screens of the game
+TEXT_CACHE = TextCache()
+
+# Function to render text through the shared cache
+def render_text(font, text, color, antialias=1):
+    return TEXT_CACHE.render(font, text, color, antialias)
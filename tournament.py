@@ -0,0 +1,120 @@
+# Description: Plays many headless games for each policy across all CPU cores and reports the results
+# Usage: python tournament.py --games 1000 --policies random,greedy,scripted
+# Imports
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from policies import POLICIES
+from profiler import percentiles
+from snake_engine import SnakeEngine
+
+MAX_TICKS = 20000 # Games that are still going after this many ticks are stopped, the scripted policy never dies
+
+# Function to play a chunk of games with one policy, runs in a worker process
+def play_chunk(policy_name, seeds, max_ticks):
+    engine = SnakeEngine()
+    results = []
+    start = time.perf_counter()
+    for seed in seeds:
+        game_start = time.perf_counter()
+        engine.reset(seed)
+        policy = POLICIES[policy_name](engine, seed)
+        state = engine.run(policy, max_ticks)
+        game_time = time.perf_counter() - game_start
+        results.append({
+            "seed": seed,
+            "score": state.score,
+            "ticks": state.ticks,
+            "fruits": state.length - 4,
+            "ticks_per_sec": state.ticks / game_time if game_time else 0.0
+        })
+    return {
+        "policy": policy_name,
+        "worker": os.getpid(),
+        "elapsed": time.perf_counter() - start,
+        "results": results
+    }
+
+# Function to summarize the results of one policy
+def summarize(results):
+    summary = {"games": len(results)}
+    for key in ("score", "ticks", "fruits", "ticks_per_sec"):
+        values = [result[key] for result in results]
+        summary[key] = dict(zip(("p50", "p90", "p99"), percentiles(values, (50, 90, 99))))
+        summary[key]["mean"] = sum(values) / len(values) if values else 0
+    return summary
+
+# Function to run the tournament, results stream back one chunk at a time as workers finish them
+def run_tournament(games, policy_names, workers=None, chunk_size=50, max_ticks=MAX_TICKS, first_seed=0, progress=None):
+    workers = workers or os.cpu_count()
+    results = {name: [] for name in policy_names}
+    worker_stats = {} # Ticks played and time spent by each worker process
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for name in policy_names:
+            for chunk_start in range(first_seed, first_seed + games, chunk_size):
+                seeds = range(chunk_start, min(chunk_start + chunk_size, first_seed + games))
+                futures.append(executor.submit(play_chunk, name, seeds, max_ticks))
+
+        for future in as_completed(futures):
+            chunk = future.result()
+            results[chunk["policy"]] += chunk["results"]
+            stats = worker_stats.setdefault(chunk["worker"], {"ticks": 0, "elapsed": 0.0})
+            stats["ticks"] += sum(result["ticks"] for result in chunk["results"])
+            stats["elapsed"] += chunk["elapsed"]
+            if progress:
+                progress(sum(len(policy_results) for policy_results in results.values()), games * len(policy_names))
+
+    elapsed = time.perf_counter() - start
+    total_ticks = sum(stats["ticks"] for stats in worker_stats.values())
+    return {
+        "games": games,
+        "workers": workers,
+        "elapsed": elapsed,
+        "ticks_per_sec": total_ticks / elapsed if elapsed else 0.0,
+        "policies": {name: summarize(policy_results) for name, policy_results in results.items()},
+        "worker_ticks_per_sec": {
+            str(worker): stats["ticks"] / stats["elapsed"] if stats["elapsed"] else 0.0 for worker, stats in worker_stats.items()
+        }
+    }
+
+# Function to print the report of a tournament
+def print_report(report):
+    print(f"{report['games']} games per policy on {report['workers']} workers in {report['elapsed']:.2f}s "
+          f"({report['ticks_per_sec']:,.0f} ticks/s)")
+    print(f"{'policy':<10} {'metric':<14} {'p50':>10} {'p90':>10} {'p99':>10} {'mean':>10}")
+    for name, summary in report["policies"].items():
+        for key in ("score", "ticks", "fruits", "ticks_per_sec"):
+            row = summary[key]
+            print(f"{name:<10} {key:<14} {row['p50']:>10.0f} {row['p90']:>10.0f} {row['p99']:>10.0f} {row['mean']:>10.1f}")
+    print("ticks/s per worker:", ", ".join(f"{value:,.0f}" for value in report["worker_ticks_per_sec"].values()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless snake games for several policies across all CPU cores.")
+    parser.add_argument("--games", type=int, default=200, help="games per policy")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="comma separated policy names: " + ", ".join(POLICIES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes, one per core by default")
+    parser.add_argument("--chunk-size", type=int, default=50, help="games sent to a worker at a time")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS, help="stop a game after this many ticks")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    policy_names = args.policies.split(",")
+    for name in policy_names:
+        if name not in POLICIES:
+            parser.error(f"unknown policy {name!r}, choose from {', '.join(POLICIES)}")
+
+    report = run_tournament(args.games, policy_names, args.workers, args.chunk_size, args.max_ticks, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()